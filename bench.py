@@ -0,0 +1,186 @@
+"""
+Benchmarks of the game's hot paths: building and dealing the cards,
+evaluating hands, playing full rounds and drawing full frames headlessly.
+
+Every benchmark is timed with timeit, the best of several repeats is
+reported in nanoseconds per operation. Results can be saved as a baseline
+and later runs compared against it, failing when a benchmark is slower
+than the baseline by more than the threshold.
+
+Usage: python bench.py [--save PATH] [--compare PATH] [--threshold FRACTION] [--repeat N] [BENCHMARK ...]
+"""
+
+# import modules
+
+import argparse, json, platform, random, sys, timeit, game
+
+REPEAT = 5 # timing repeats, the best one is kept
+MIN_TIME = 0.2 # minimum duration of each repeat in seconds
+THRESHOLD = 0.1 # allowed slowdown against the baseline
+
+def bench_deck_build():
+    deck = game.Deck(False)
+    return (deck.build, 1)
+
+def bench_deck_reset():
+    deck = game.Deck(False)
+    return (deck.reset, 1)
+
+def bench_deck_deal():
+    deck = game.Deck(False, None, random.Random(0))
+    cards = list(deck.get_cards())
+    def deal():
+        # deals the whole deck
+        deck.cards = list(cards)
+        for i in range(52):
+            deck.deal()
+    return (deal, 52)
+
+def bench_shoe_deal():
+    shoe = game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(0))
+    def deal():
+        for i in range(52):
+            shoe.deal()
+        shoe.reset()
+    return (deal, 52)
+
+def bench_shoe_shuffle():
+    shoe = game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(0))
+    return (shoe.shuffle, 1)
+
+def bench_shoe_shuffle_numpy():
+    import rng
+    shoe = game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, rng.NumpyRandom(0))
+    return (shoe.shuffle, 1)
+
+def bench_hand_value():
+    deck = game.Deck(False)
+    hand = game.Hand()
+    for code in (0, 22, 35):
+        hand.add_card(deck.get_cards()[code])
+    def evaluate():
+        hand.get_value()
+        hand.is_bust()
+    return (evaluate, 1)
+
+def bench_round():
+    table = game.Table(game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(0)))
+    player_hand = table.get_player_hand()
+    def play():
+        # PlayerHand.deal -> AIHand.start -> handle_compare_scores
+        player_hand.deal()
+        if player_hand.is_playing:
+            player_hand.stand()
+    return (play, 1)
+
+def bench_play_rounds():
+    table = game.Table(game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(0)))
+    rounds = [[game.ACTION_HIT]] * 1000
+    return (lambda: table.play_rounds(rounds), 1000)
+
+def create_game():
+    random.seed(0)
+    blackjack = game.main(game.HeadlessBackend())
+    return (blackjack, blackjack.get_frame().get())
+
+def bench_frame_draw():
+    blackjack, frame = create_game()
+    canvas = game.RecordingCanvas()
+    def draw():
+        canvas.clear()
+        frame.draw(canvas)
+    return (draw, 1)
+
+def bench_frame_draw_new_round():
+    blackjack, frame = create_game()
+    canvas = game.RecordingCanvas()
+    def draw():
+        # the hands and the notification are drawn again
+        blackjack.new_game()
+        canvas.clear()
+        frame.draw(canvas)
+    return (draw, 1)
+
+BENCHMARKS = (
+    ('deck_build', bench_deck_build),
+    ('deck_reset', bench_deck_reset),
+    ('deck_deal', bench_deck_deal),
+    ('shoe_deal', bench_shoe_deal),
+    ('shoe_shuffle', bench_shoe_shuffle),
+    ('shoe_shuffle_numpy', bench_shoe_shuffle_numpy),
+    ('hand_value', bench_hand_value),
+    ('round', bench_round),
+    ('play_rounds', bench_play_rounds),
+    ('frame_draw', bench_frame_draw),
+    ('frame_draw_new_round', bench_frame_draw_new_round)
+)
+
+def measure(setup, repeat = REPEAT, min_time = MIN_TIME):
+    """
+    Times a benchmark
+
+    <callable> setup    Returns (callable, number of operations per call)
+
+    Returns the best time of an operation in nanoseconds
+    """
+    function, operations = setup()
+    timer = timeit.Timer(function)
+    # calibrate the number of calls so that every repeat lasts long enough
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat, number))
+    return best / number / operations * 1e9
+
+def run(names = None, repeat = REPEAT, min_time = MIN_TIME):
+    """
+    Runs the benchmarks (all of them when no names are given)
+
+    Returns a dictionary of the nanoseconds per operation keyed by benchmark name
+    """
+    results = {}
+    for name, setup in BENCHMARKS:
+        if not names or name in names:
+            results[name] = measure(setup, repeat, min_time)
+    return results
+
+def save(results, path):
+    """
+    Saves the results as a baseline
+    """
+    with open(path, 'w') as f:
+        json.dump({'python': platform.python_version(), 'results': results}, f, indent=2, sort_keys=True)
+
+def compare(results, path, threshold = THRESHOLD):
+    """
+    Compares the results against a baseline
+
+    Returns a list of (name, baseline, result) of the regressed benchmarks
+    """
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name in baseline and result > baseline[name] * (1 + threshold):
+            regressions.append((name, baseline[name], result))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the game\'s hot paths.')
+    parser.add_argument('benchmarks', nargs='*', help='names of the benchmarks to run, all by default')
+    parser.add_argument('--save', default=None, help='saves the results as a baseline')
+    parser.add_argument('--compare', default=None, help='fails when slower than this baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed slowdown (0.1 for 10%%)')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+    results = run(args.benchmarks, args.repeat)
+    for name, result in sorted(results.items()):
+        print("%-24s %12.1f ns" % (name, result))
+    if args.save:
+        save(results, args.save)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for name, baseline, result in regressions:
+            print("regression: %s %.1f ns -> %.1f ns (+%.0f%%)" % (name, baseline, result, (result / baseline - 1) * 100))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,133 @@
+"""
+Pre-generated corpus of shoe orderings. Seeded shoes are stored as packed
+uint8 card codes in a flat file after a 64-byte header, one row of
+decks * 52 codes per shoe. Shoes deal from a numpy.memmap view of the file
+through CorpusRandom, so runs can replay identical shoes (common random
+numbers across strategy comparisons) without shuffling them again.
+
+Usage: python corpus.py PATH SHOES [--decks DECKS] [--seed SEED]
+"""
+
+# import modules
+
+import argparse, os, struct, game
+import numpy
+
+MAGIC = b'BJSC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ') # magic, version, decks, shoes, seed
+HEADER_SIZE = 64
+BLOCK_SHOES = 4096 # shoes generated at once
+
+def generate(path, shoes, decks = game.SHOE_DECKS, seed = 0, block_shoes = BLOCK_SHOES):
+    """
+    Generates a corpus of shuffled shoes
+
+    <string> path
+    <int> shoes         Number of shoes
+    <int> decks         Decks per shoe
+    <int> seed
+    <int> block_shoes   Shoes generated at once
+    """
+    generator = numpy.random.Generator(numpy.random.PCG64(seed))
+    cards = numpy.tile(numpy.arange(52, dtype=numpy.uint8), decks)
+    # write to a temporary file first so that readers never see a partial corpus
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, decks, shoes, seed).ljust(HEADER_SIZE, b'\0'))
+        for start in range(0, shoes, block_shoes):
+            block = numpy.tile(cards, (min(block_shoes, shoes - start), 1))
+            generator.permuted(block, axis=1, out=block)
+            block.tofile(f)
+    os.rename(temporary_path, path)
+
+class Corpus:
+    def __init__(self, path):
+        """
+        Maps a corpus in memory
+
+        <string> path
+        """
+        with open(path, 'rb') as f:
+            magic, version, decks, shoes, seed = HEADER.unpack_from(f.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a shoe corpus of version %d' % VERSION)
+        self.path = path
+        self.decks = decks
+        self.seed = seed
+        self.shoes = numpy.memmap(path, numpy.uint8, 'r', HEADER_SIZE, (shoes, decks * 52))
+    def get_shoes(self):
+        """
+        Retrieve the read-only (shoes, decks * 52) array of card codes
+        """
+        return self.shoes
+    def get_shoe(self, index):
+        return self.shoes[index]
+    def get_count(self):
+        return len(self.shoes)
+    def get_decks(self):
+        return self.decks
+    def get_seed(self):
+        return self.seed
+
+class CorpusRandom:
+    def __init__(self, corpus, start = 0, step = 1):
+        """
+        Source of randomness for a Shoe which orders the cards as the
+        corpus' shoes instead of shuffling them. The shoes are taken
+        from start every step shoes (so that several tables can share
+        a corpus), starting over once the corpus is exhausted. A start
+        past the corpus' last shoe wraps around.
+
+        <Corpus> corpus
+        <int> start
+        <int> step
+        """
+        self.corpus = corpus
+        self.start = start % corpus.get_count()
+        self.step = step
+        self.index = self.start
+        self.cards = None
+        self.pool = None
+    def next_shoe(self):
+        """
+        Returns the card codes of the next shoe
+        """
+        if self.index >= self.corpus.get_count():
+            self.index = self.start
+        shoe = self.corpus.get_shoe(self.index)
+        self.index += self.step
+        return shoe
+    def shuffle(self, cards):
+        """
+        Orders the cards (of the corpus' number of decks) as the next shoe
+        """
+        # keep the cards sorted by code, every code appears once per deck
+        if cards is not self.cards:
+            self.cards = cards
+            self.pool = sorted(cards, key=lambda card: card.code)
+        # the n-th card of a code in the shoe is the n-th card of the code in the pool,
+        # which is where a stable sort of the codes places it
+        order = numpy.argsort(self.next_shoe(), kind='stable')
+        cards[:] = [self.pool[i] for i in numpy.argsort(order).tolist()]
+
+def create_shoe(corpus, start = 0, step = 1, penetration = game.SHOE_PENETRATION, load_images = False):
+    """
+    Creates a new shoe dealing the corpus' shoes
+
+    <Corpus> corpus
+    <int> start
+    <int> step
+    <float> penetration
+    <bool> load_images
+    """
+    return game.Shoe(corpus.get_decks(), penetration, load_images, None, CorpusRandom(corpus, start, step))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates a corpus of shuffled shoes.')
+    parser.add_argument('path')
+    parser.add_argument('shoes', type=int)
+    parser.add_argument('--decks', type=int, default=game.SHOE_DECKS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate(args.path, args.shoes, args.decks, args.seed)
@@ -6,7 +6,25 @@ Website: http://vu-tran.com/
 
 # import modules
 
-import simplegui, random
+import random
+
+try:
+    from weakref import WeakMethod
+except ImportError:
+    # weak references aren't available (CodeSkulptor), handlers are kept alive
+    WeakMethod = None
+
+try:
+    from array import array
+except ImportError:
+    # results of batches are returned as lists instead
+    array = None
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    # only time.time is available (CodeSkulptor)
+    from time import time as clock
 
 # configurations
 
@@ -18,34 +36,586 @@ CARD_BACK_IMAGE_SRC = "https://www.dropbox.com/s/t8ib5k3z1uv6w7v/cards-back.png?
 CARD_IMAGE_SIZE = (72, 96) # the dimensions of the card
 HAND_GUTTER_SIZE = 5 # width between each card in the hand
 BUTTONS_SIZE = (163, 30) # size of the buttons
+SHOE_DECKS = 6 # number of decks in the shoe
+SHOE_PENETRATION = 0.75 # fraction of the shoe dealt before it's reshuffled
+OUTCOME_WIN = 1 # the player won the round
+OUTCOME_LOSS = -1 # the player lost the round
+OUTCOME_PUSH = 0 # the bet is returned (see Rules)
+ACTION_HIT = 1 # actions of the player recorded by the table
+ACTION_STAND = 2
+ACTION_DEAL_NEW = 3 # dealt a new hand in the middle of a round
+ACTION_DOUBLE = 4 # doubled the bet and took one card
+CONFIDENCE_Z = 1.96 # z-score of the 95% confidence intervals
 
-class Dispatcher:
+# categories of the settled rounds
+
+CATEGORIES = ('player_21', 'player_bust', 'ai_21', 'ai_bust', 'higher', 'lower', 'tie', 'deal_new')
+CATEGORY_PLAYER_21 = 0 # the player reached 21
+CATEGORY_PLAYER_BUST = 1
+CATEGORY_AI_21 = 2
+CATEGORY_AI_BUST = 3
+CATEGORY_HIGHER = 4 # the player's hand is higher than the AI's
+CATEGORY_LOWER = 5
+CATEGORY_TIE = 6 # ties are lost, or pushed (see Rules)
+CATEGORY_DEAL_NEW = 7 # the player dealt a new hand in the middle of a round
+SETTLE_MESSAGES = (
+    'You won! You have 21! New Deal?',
+    'You lost! You BUSTED! New Deal?',
+    'You lost! AI has 21! New Deal?',
+    'You won! AI busted! New Deal?',
+    'You won! New Deal?',
+    'You lost! New Deal?',
+    'You lost! New Deal?',
+    'You lost! New Deal?'
+) # message of each category
+PUSH_MESSAGE = 'Push! New Deal?'
+
+# card tables, every card is identified by its code (suit index * 13 + rank index)
+
+SUITS = ('C', 'S', 'H', 'D')
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+RANK_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10) # Aces count as 11
+CARD_SUIT_INDEXES = tuple([code // 13 for code in range(52)])
+CARD_RANK_INDEXES = tuple([code % 13 for code in range(52)])
+CARD_SUITS = tuple([SUITS[i] for i in CARD_SUIT_INDEXES])
+CARD_RANKS = tuple([RANKS[i] for i in CARD_RANK_INDEXES])
+CARD_VALUES = tuple([RANK_VALUES[i] for i in CARD_RANK_INDEXES])
+CARD_LOWER_VALUES = tuple([1 if i == 0 else RANK_VALUES[i] for i in CARD_RANK_INDEXES]) # Aces count as 1
+CARD_ACES = tuple([1 if i == 0 else 0 for i in CARD_RANK_INDEXES])
+HAND_STATE_BUST = 0 # state of a busted hand, see Hand.get_state
+HAND_STATES = 46 # number of hand states (values up to 22, hard or soft)
+
+# draw commands of the display lists (see RecordingCanvas)
+
+DRAW_COMMANDS = ('draw_image', 'draw_polygon', 'draw_text', 'draw_line', 'draw_polyline', 'draw_circle', 'draw_point')
+DRAW_IMAGE = 0
+DRAW_POLYGON = 1
+DRAW_TEXT = 2
+DRAW_LINE = 3
+DRAW_POLYLINE = 4
+DRAW_CIRCLE = 5
+DRAW_POINT = 6
+
+# latency histograms of the profiler, values are recorded in nanoseconds
+
+HISTOGRAM_SUB_BUCKETS = 16 # buckets per power of 2, values are kept within 1/16
+HISTOGRAM_BUCKETS = 64 * HISTOGRAM_SUB_BUCKETS
+
+# card counting systems, the tag of each rank (A, 2, ..., K)
+COUNTING_SYSTEMS = {
+    'hi-lo': (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1),
+    'ko': (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1),
+}
+
+class SimpleGUIBackend:
+    def __init__(self):
+        """
+        Creates a new backend drawing with simplegui (CodeSkulptor).
+        The module is only imported once the backend is used.
+        """
+        self.module = None
+    def get_module(self):
+        if self.module is None:
+            import simplegui
+            self.module = simplegui
+        return self.module
+    def create_frame(self, title, width, height):
+        return self.get_module().create_frame(title, width, height)
+    def load_image(self, src):
+        return self.get_module().load_image(src)
+
+class HeadlessImage:
+    def __init__(self, src):
+        """
+        Placeholder of an image which is never loaded
+        """
+        self.src = src
+    def get_width(self):
+        return 0
+    def get_height(self):
+        return 0
+
+class HeadlessFrame:
+    def __init__(self, title, width, height):
+        """
+        Frame which never opens a window. The handlers can be called
+        directly through draw and click.
+        """
+        self.title = title
+        self.size = (width, height)
+        self.buttons = []
+        self.draw_handler = None
+        self.mouseclick_handler = None
+    def add_button(self, label, handler):
+        self.buttons.append((label, handler))
+    def set_draw_handler(self, handler):
+        self.draw_handler = handler
+    def set_mouseclick_handler(self, handler):
+        self.mouseclick_handler = handler
+    def get_canvas_textwidth(self, text, size, face = 'serif'):
+        """
+        Approximates the width of the text (half of the font size per character)
+        """
+        return len(text) * size / 2
+    def start(self):
+        pass
+    def draw(self, canvas):
+        """
+        Runs the draw handler once with the given canvas
+        """
+        if self.draw_handler:
+            self.draw_handler(canvas)
+    def click(self, position):
+        """
+        Runs the mouse click handler once
+        """
+        if self.mouseclick_handler:
+            self.mouseclick_handler(position)
+    def render(self):
+        """
+        Draws a frame offscreen
+
+        Returns the RecordingCanvas holding the frame's display list
+        """
+        canvas = RecordingCanvas()
+        self.draw(canvas)
+        return canvas
+
+class HeadlessBackend:
+    """
+    Backend which never loads images nor opens windows
+    """
+    def create_frame(self, title, width, height):
+        return HeadlessFrame(title, width, height)
+    def load_image(self, src):
+        return HeadlessImage(src)
+
+class SpriteCache:
+    def __init__(self):
+        """
+        Creates a new cache of the loaded images, keyed by their source
+        """
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+    def load(self, src):
+        """
+        Retrieve the image for the given source. The image is only
+        loaded the first time it is requested, the same handle is
+        shared afterwards.
+
+        <string> src
+        """
+        if src in self.images:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.images[src] = backend.load_image(src)
+        return self.images[src]
+    def get_hits(self):
+        return self.hits
+    def get_misses(self):
+        return self.misses
+    def clear(self):
+        """
+        Forgets all of the loaded images and resets the counters
+        """
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+
+class LatencyHistogram:
     def __init__(self):
-        self.events = []
-    def add(self, event_name, handler):
         """
-        Registers a new event handler
+        Creates a new histogram of latencies in the manner of HDR histograms:
+        the buckets are spaced logarithmically, each power of 2 being split
+        in HISTOGRAM_SUB_BUCKETS linear buckets, so that the memory is fixed
+        and the values are kept within a fixed relative precision.
+        """
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+    def get_index(self, value):
+        """
+        Returns the index of the bucket of the given value
         """
-        data = {
-            "name": event_name,
-            "handler": handler
+        shift = max(0, value.bit_length() - 5)
+        return min(HISTOGRAM_BUCKETS - 1, shift * HISTOGRAM_SUB_BUCKETS + (value >> shift))
+    def get_bucket_value(self, index):
+        """
+        Returns the highest value of the given bucket
+        """
+        shift = max(0, index // HISTOGRAM_SUB_BUCKETS - 1)
+        return ((index - shift * HISTOGRAM_SUB_BUCKETS + 1) << shift) - 1
+    def record(self, value):
+        """
+        Records a value
+
+        <int> value     Latency in nanoseconds
+        """
+        self.counts[self.get_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+    def get_count(self):
+        return self.count
+    def get_total(self):
+        return self.total
+    def get_max(self):
+        return self.max
+    def get_percentile(self, percentile):
+        """
+        Returns the value below which the given percentage of the values fall
+        """
+        if self.count == 0:
+            return 0
+        # number of values up to the percentile (rounded up)
+        target = max(1, -(-self.count * percentile // 100))
+        seen = 0
+        for index in range(HISTOGRAM_BUCKETS):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.max, self.get_bucket_value(index))
+        return self.max
+    def merge(self, other):
+        for index in range(HISTOGRAM_BUCKETS):
+            self.counts[index] += other.counts[index]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    def get_summary(self):
+        """
+        Retrieve the calls, total, mean, p50, p99 and max latencies (in nanoseconds)
+        """
+        return {
+            'calls': self.count,
+            'total': self.total,
+            'mean': self.total // max(1, self.count),
+            'p50': self.get_percentile(50),
+            'p99': self.get_percentile(99),
+            'max': self.max
         }
-        self.events.append(data)
+
+def get_handler_name(handler):
+    """
+    Returns a readable name of the event handler, such as 'PlayerHand.draw_cards'
+    """
+    owner = getattr(handler, '__self__', None)
+    # layers are named after the handler they record
+    if isinstance(owner, Layer):
+        return get_handler_name(owner.render)
+    name = getattr(handler, '__name__', None) or repr(handler)
+    if owner is not None:
+        name = owner.__class__.__name__ + '.' + name
+    return name
+
+class Profiler:
+    def __init__(self, dump_interval = None, dump_handler = None):
+        """
+        Creates a new profiler of the dispatched events. Every handler's
+        latencies are recorded in its own histogram, as well as the latency
+        of each whole event (the frame time of 'draw' events).
+
+        <float> dump_interval       Seconds between dumps of the snapshot, never dumped when omitted
+        <callable> dump_handler     Called with each dumped snapshot, prints it when omitted
+        """
+        self.dump_interval = dump_interval
+        self.dump_handler = dump_handler
+        self.reset()
+    def reset(self):
+        """
+        Forgets all of the recorded latencies
+        """
+        self.events = {}
+        # (name, histogram) keyed by (event name, registration of the handler)
+        self.handlers = {}
+        self.last_dump = clock()
+    def record(self, event_name, registration, handler, elapsed):
+        """
+        Records the latency of a handler
+
+        <string> event_name
+        <int> registration      Registration number of the handler in the dispatcher
+        <callable> handler
+        <float> elapsed         Seconds
+        """
+        key = (event_name, registration)
+        if key not in self.handlers:
+            self.handlers[key] = (get_handler_name(handler), LatencyHistogram())
+        self.handlers[key][1].record(int(elapsed * 1e9))
+    def record_event(self, event_name, elapsed):
+        """
+        Records the latency of a whole event, dumps the snapshot when it's time to
+        """
+        if event_name not in self.events:
+            self.events[event_name] = LatencyHistogram()
+        self.events[event_name].record(int(elapsed * 1e9))
+        if self.dump_interval is not None and clock() - self.last_dump >= self.dump_interval:
+            self.dump()
+    def snapshot(self):
+        """
+        Retrieve the summaries (see LatencyHistogram.get_summary) of the events
+        and of their handlers, the handlers are sorted from the slowest in total
+
+        Returns a dictionary with the 'events' and 'handlers' summaries keyed by event name
+        """
+        handlers = {}
+        for key, (name, histogram) in self.handlers.items():
+            summary = histogram.get_summary()
+            summary['handler'] = name
+            handlers.setdefault(key[0], []).append(summary)
+        for summaries in handlers.values():
+            summaries.sort(key=lambda summary: -summary['total'])
+        events = {}
+        for name, histogram in self.events.items():
+            events[name] = histogram.get_summary()
+        return {'events': events, 'handlers': handlers}
+    def dump(self):
+        """
+        Passes a snapshot to the dump handler (prints it by default)
+        """
+        self.last_dump = clock()
+        snapshot = self.snapshot()
+        if self.dump_handler:
+            self.dump_handler(snapshot)
+            return
+        for event_name in sorted(snapshot['events']):
+            summary = snapshot['events'][event_name]
+            print("%s: %d calls, p50 %d ns, p99 %d ns, max %d ns" % (event_name, summary['calls'], summary['p50'], summary['p99'], summary['max']))
+            for summary in snapshot['handlers'].get(event_name, []):
+                print("    %s: %d ns total, p50 %d ns, p99 %d ns" % (summary['handler'], summary['total'], summary['p50'], summary['p99']))
+
+class Dispatcher:
+    def __init__(self):
+        # handlers of each event name, ordered by priority then registration
+        self.events = {}
+        self.counter = 0
+        # profiles the handlers when set
+        self.profiler = None
+    def add(self, event_name, handler, priority = 0, weak = True):
+        """
+        Registers a new event handler. Handlers with a higher priority
+        run first. Bound methods are weakly referenced (when available)
+        so that the dispatcher doesn't keep dead components alive.
+
+        <string> event_name
+        <callable> handler
+        <int> priority
+        <bool> weak
+        """
+        reference = None
+        if weak and WeakMethod and getattr(handler, '__self__', None) is not None:
+            try:
+                reference = WeakMethod(handler)
+                handler = None
+            except TypeError:
+                # builtin methods (e.g. list.append) aren't bound methods, keep them alive
+                reference = None
+        self.counter += 1
+        data = (-priority, self.counter, handler, reference)
+        # copy the list so that running events aren't affected
+        handlers = list(self.events.get(event_name, []))
+        handlers.append(data)
+        handlers.sort(key=lambda e: (e[0], e[1]))
+        self.events[event_name] = handlers
+    def remove(self, event_name, handler):
+        """
+        Unregisters the given event handler
+
+        Returns True if the handler was registered
+        """
+        handlers = self.events.get(event_name, [])
+        kept = [e for e in handlers if not (e[2] == handler or (e[3] is not None and e[3]() == handler))]
+        self.events[event_name] = kept
+        return len(kept) != len(handlers)
+    def clear(self, event_name = None):
+        """
+        Unregisters all of the handlers of the given event, or of every event
+        """
+        if event_name is None:
+            self.events = {}
+        else:
+            self.events[event_name] = []
+    def get_handlers(self, event_name):
+        """
+        Retrieve the live handlers registered for the given event name
+        """
+        handlers = []
+        for e in self.events.get(event_name, []):
+            handler = e[2]
+            if handler is None:
+                handler = e[3]()
+            if handler is not None:
+                handlers.append(handler)
+        return handlers
+    def prune(self, event_name):
+        """
+        Drops the handlers of components which no longer exist
+        """
+        self.events[event_name] = [e for e in self.events.get(event_name, []) if e[3] is None or e[3]() is not None]
+    def set_profiler(self, profiler):
+        """
+        Sets the Profiler recording the latencies of the handlers, None disables the profiling
+        """
+        self.profiler = profiler
+    def get_profiler(self):
+        return self.profiler
     def run(self, name, args):
         """
         Runs all events that matches the given name
         """
-        # iterate through all events
-        for e in self.events:
-            # if it's of the draw type
-            if e['name'] == name:
-                # call the given handler
-                e['handler'](args)
+        if self.profiler is not None:
+            self.run_profiled(name, args)
+            return
+        dead = False
+        # iterate through the handlers of the event
+        for e in self.events.get(name, ()):
+            handler = e[2]
+            # resolve the weak reference
+            if handler is None:
+                handler = e[3]()
+                if handler is None:
+                    dead = True
+                    continue
+            # call the given handler
+            handler(args)
+        if dead:
+            self.prune(name)
+    def run_profiled(self, name, args):
+        """
+        Runs all events that matches the given name and records their latencies
+        """
+        profiler = self.profiler
+        dead = False
+        start = clock()
+        for e in self.events.get(name, ()):
+            handler = e[2]
+            if handler is None:
+                handler = e[3]()
+                if handler is None:
+                    dead = True
+                    continue
+            handler_start = clock()
+            handler(args)
+            profiler.record(name, e[1], handler, clock() - handler_start)
+        profiler.record_event(name, clock() - start)
+        if dead:
+            self.prune(name)
+
+class RecordingCanvas:
+    def __init__(self):
+        """
+        Creates a new canvas which records the draw calls into a display
+        list of (command, arguments) pairs, the commands being indexes
+        of DRAW_COMMANDS
+        """
+        self.commands = []
+    def draw_image(self, *args):
+        self.commands.append((DRAW_IMAGE, args))
+    def draw_polygon(self, *args):
+        self.commands.append((DRAW_POLYGON, args))
+    def draw_text(self, *args):
+        self.commands.append((DRAW_TEXT, args))
+    def draw_line(self, *args):
+        self.commands.append((DRAW_LINE, args))
+    def draw_polyline(self, *args):
+        self.commands.append((DRAW_POLYLINE, args))
+    def draw_circle(self, *args):
+        self.commands.append((DRAW_CIRCLE, args))
+    def draw_point(self, *args):
+        self.commands.append((DRAW_POINT, args))
+    def get_commands(self):
+        """
+        Retrieve the display list
+        """
+        return self.commands
+    def clear(self):
+        self.commands = []
+    def replay(self, canvas):
+        """
+        Runs the recorded draw calls on the given canvas
+        """
+        for command in self.commands:
+            getattr(canvas, DRAW_COMMANDS[command[0]])(*command[1])
+
+class Layer(RecordingCanvas):
+    def __init__(self, render):
+        """
+        Creates a new layer which records the draw calls of the given
+        render handler and replays them on every frame until the layer
+        is marked as dirty
+
+        <callable> render       Draw handler, called with the layer as the canvas
+        """
+        RecordingCanvas.__init__(self)
+        self.render = render
+        self.dirty = True
+    def mark_dirty(self):
+        """
+        Requests the draw calls to be recorded again on the next frame
+        """
+        self.dirty = True
+    def is_dirty(self):
+        return self.dirty
+    def draw(self, canvas):
+        """
+        Draw handler, replays the recorded draw calls on the canvas
+        """
+        # record the draw calls again if the state changed
+        if self.dirty:
+            self.clear()
+            self.render(self)
+            self.dirty = False
+        self.replay(canvas)
+
+class TextMeasurer:
+    def __init__(self, measure, max_size = 64):
+        """
+        Creates a new cache of text widths keyed by (text, font size, font face).
+        The least recently used widths are evicted once the cache is full.
+
+        <callable> measure      Measures the width of a text, e.g. get_canvas_textwidth
+        <int> max_size
+        """
+        self.measure = measure
+        self.max_size = max_size
+        # maps a key to its [width, last use]
+        self.widths = {}
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+    def get_width(self, text, font_size, font_face = 'serif'):
+        """
+        Retrieve the width of the given text, the text is only measured
+        when it isn't cached yet
+        """
+        self.clock += 1
+        key = (text, font_size, font_face)
+        entry = self.widths.get(key)
+        if entry is None:
+            self.misses += 1
+            # evict the least recently used width
+            if len(self.widths) >= self.max_size:
+                oldest = min(self.widths, key=lambda k: self.widths[k][1])
+                del self.widths[oldest]
+            entry = [self.measure(text, font_size, font_face), self.clock]
+            self.widths[key] = entry
+        else:
+            self.hits += 1
+            entry[1] = self.clock
+        return entry[0]
+    def get_hits(self):
+        return self.hits
+    def get_misses(self):
+        return self.misses
 
 class Frame:
     def __init__(self, frame, size):
         self.frame = frame
         self.size = size
+        self.text_measurer = TextMeasurer(frame.get_canvas_textwidth)
     def get_width(self):
         """
         Returns the width of the frame
@@ -61,6 +631,11 @@ class Frame:
         Returns the frame object
         """
         return self.frame
+    def get_text_width(self, text, font_size, font_face = 'serif'):
+        """
+        Returns the width of the text drawn on the canvas
+        """
+        return self.text_measurer.get_width(text, font_size, font_face)
     def start(self):
         """
         Starts the frame
@@ -77,10 +652,16 @@ class Frame:
         self.get().set_mouseclick_handler(handler)
 
 class Game:
-    def __init__(self, size):
+    def __init__(self, size, dispatcher = None):
         """
         Creates a new game window
+
+        <tuple> size
+        <Dispatcher> dispatcher     The game's events, a new dispatcher is created when omitted
         """
+        if dispatcher is None:
+            dispatcher = Dispatcher()
+        self.dispatcher = dispatcher
         # sets the window's size
         self.set_window_size(size)
         # creates the Frame
@@ -105,7 +686,7 @@ class Game:
         """
         Creates and returns a new Frame instance and set's the draw handler
         """
-        sg_frame = simplegui.create_frame("Game", self.get_window_width(), self.get_window_height())
+        sg_frame = backend.create_frame("Game", self.get_window_width(), self.get_window_height())
         # create a new Frame instance
         frame = Frame(sg_frame, self.get_window_size())
         # sets the draw handler
@@ -119,6 +700,8 @@ class Game:
         Retrieve the Frame instance
         """
         return self.frame
+    def get_dispatcher(self):
+        return self.dispatcher
     def start(self):
         """
         Starts the game (opens the game frame)
@@ -128,21 +711,74 @@ class Game:
         """
         Draw handler
         """
-        dispatcher.run('draw', canvas)
+        self.dispatcher.run('draw', canvas)
     def onclick(self, position):
         """
         Mouseclick handler
         """
-        dispatcher.run('click', position)
+        self.dispatcher.run('click', position)
+
+class Atlas:
+    def __init__(self, image_src, back_image_src, card_size, ranks = RANKS, suits = SUITS):
+        """
+        Creates a new card sheet and computes the source center of
+        every card once
+
+        <string> image_src
+        <string> back_image_src
+        <tuple> card_size       The size of a card in the sheet
+        <tuple> ranks           The ranks in the order of the sheet's columns
+        <tuple> suits           The suits in the order of the sheet's rows
+        """
+        self.image_src = image_src
+        self.back_image_src = back_image_src
+        self.card_size = card_size
+        # build the table of source centers, indexed by the card code
+        self.center_sources = self.build(ranks, suits)
+    def build(self, ranks, suits):
+        """
+        Builds and returns the source center of every card code
+        """
+        # set the center of the card
+        center = (self.card_size[0] / 2, self.card_size[1] / 2)
+        center_sources = []
+        for code in range(52):
+            # retrieve the column and row of the card in the sheet
+            column = ranks.index(CARD_RANKS[code])
+            row = suits.index(CARD_SUITS[code])
+            center_sources.append((center[0] + (column * self.card_size[0]), center[1] + (row * self.card_size[1])))
+        return tuple(center_sources)
+    def get_image_src(self):
+        return self.image_src
+    def get_back_image_src(self):
+        return self.back_image_src
+    def get_card_size(self):
+        return self.card_size
+    def get_center_source(self, card):
+        """
+        Retrieve the source center of the given card in the sheet
+        """
+        return self.center_sources[card.code]
 
 class Deck:
-    def __init__(self):
+    def __init__(self, load_images = True, atlas = None, rng = None):
         """
         Creates a new deck of cards
+
+        <bool> load_images      If set to False, the card images are never loaded (headless play)
+        <Atlas> atlas           The card sheet, defaults to the game's card images
+        <Random> rng            Source of randomness (shuffle and randrange), defaults to the random module
         """
         # set the available suits
-        self.SUITS = ('C', 'S', 'H', 'D')
-        self.RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+        self.SUITS = SUITS
+        self.RANKS = RANKS
+        self.load_images = load_images
+        if atlas is None:
+            atlas = card_atlas
+        self.atlas = atlas
+        if rng is None:
+            rng = random
+        self.rng = rng
         # builds the deck
         self.cards = self.build()
     def build(self):
@@ -150,26 +786,27 @@ class Deck:
         Builds and returns an list of cards
         """
         cards = []
-        # for each suit
-        for s in self.SUITS:
-            # for each rank
-            for r in self.RANKS:
-                # create a new card
-                card = Card(s, r)
+        # for each card code (ordered by suit then rank)
+        for code in range(52):
+            # create a new card
+            card = Card(code)
+            if self.load_images:
                 # set's the image src
-                card.set_image_src(CARD_IMAGE_SRC)
+                card.set_image_src(self.atlas.get_image_src())
                 # set the back image src
-                card.set_back_image_src(CARD_BACK_IMAGE_SRC)
-                # set's the card size
-                card.set_size(CARD_IMAGE_SIZE)
-                # add the new card into the list
-                cards.append(card)
+                card.set_back_image_src(self.atlas.get_back_image_src())
+            # set's the card size
+            card.set_size(self.atlas.get_card_size())
+            # set the center source
+            card.set_center_source(self.atlas.get_center_source(card))
+            # add the new card into the list
+            cards.append(card)
         return cards
     def shuffle(self):
         """
         Shuffles the deck
         """
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
     def reset(self):
         """
         Resets the deck
@@ -182,10 +819,20 @@ class Deck:
         Returns a randomly dealt card
         """
         # choose a random index
-        rand_index = random.randrange(0, len(self.get_cards()))
+        rand_index = self.rng.randrange(0, len(self.get_cards()))
         # remove the card from the index
         card = self.get_cards().pop(rand_index)
         return card
+    def deal_hidden(self):
+        """
+        Deals a card faced down, the card is turned over by reveal
+        """
+        return self.deal()
+    def reveal(self, card):
+        """
+        Turns over a card
+        """
+        card.show()
     def get_cards(self):
         """
         Retrieve the list of cards
@@ -201,38 +848,193 @@ class Deck:
         Given the suit, find the index in the tuple
         """
         return self.SUITS.index(suit)
+    def get_atlas(self):
+        return self.atlas
     def calculate_center_position(self, card):
         """
-        Calculates the card's center positions
+        Retrieve the card's center position in the card sheet
         """
-        # retrieve the card size
-        size = card.get_size()
-        # set the center of the card
-        center = (size[0] / 2, size[1] / 2)
-        # retrieve the rank index
-        rank_index = self.get_rank_index(card.get_rank())
-        # retrieve the suit index
-        suit_index = self.get_suit_index(card.get_suit())
-        # calculate the position of the card
-        position = (center[0] + (rank_index * size[0]), center[1] + (suit_index * size[1]))
-        return position
+        return self.atlas.get_center_source(card)
+
+class Shoe(Deck):
+    def __init__(self, decks = SHOE_DECKS, penetration = SHOE_PENETRATION, load_images = True, atlas = None, rng = None, counting_system = 'hi-lo'):
+        """
+        Creates a new shoe of several decks shuffled together. The cards
+        are dealt in order and the shoe is only reshuffled once the cut
+        card has been reached. The count and the composition of the cards
+        left are kept up to date as the cards are seen: when they are dealt,
+        or when they are revealed for the cards dealt faced down.
+
+        <int> decks
+        <float> penetration     Fraction of the shoe dealt before the cut card
+        <bool> load_images
+        <Atlas> atlas
+        <Random> rng
+        <string> counting_system    A key of COUNTING_SYSTEMS
+        """
+        self.decks = decks
+        self.penetration = penetration
+        self.shuffles = 0
+        # calls the parent method
+        Deck.__init__(self, load_images, atlas, rng)
+        self.set_counting_system(counting_system)
+        self.shuffle()
+    def build(self):
+        """
+        Builds and returns the list of cards of all of the decks
+        """
+        cards = []
+        for i in range(self.decks):
+            cards.extend(Deck.build(self))
+        return cards
+    def shuffle(self):
+        """
+        Shuffles the whole shoe and places the cut card
+        """
+        self.rng.shuffle(self.cards)
+        self.shuffles += 1
+        self.position = 0
+        self.cut_card = int(len(self.cards) * self.penetration)
+        # all of the cards are back in the shoe
+        self.running_count = self.initial_count
+        self.composition = [4 * self.decks] * 13
+        # cards dealt faced down, not counted yet
+        self.hidden = []
+    def reset(self):
+        """
+        Prepares the shoe for a new round, reshuffles it once the cut card has been reached
+        """
+        if self.position >= self.cut_card:
+            self.shuffle()
+    def deal(self):
+        """
+        Returns the next card of the shoe
+        """
+        card = self.take()
+        self.count(card)
+        return card
+    def deal_hidden(self):
+        """
+        Returns the next card of the shoe faced down, it is counted once revealed
+        """
+        card = self.take()
+        self.hidden.append(card)
+        return card
+    def reveal(self, card):
+        """
+        Turns over a card and counts it if it was dealt faced down
+        """
+        if card in self.hidden:
+            self.hidden.remove(card)
+            self.count(card)
+        card.show()
+    def take(self):
+        """
+        Removes the next card from the shoe
+        """
+        # the shoe ran out in the middle of a round, the cards in play are
+        # still held by the hands so a new set of cards is shuffled
+        if self.position >= len(self.cards):
+            self.cards = self.build()
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        # cards are reused after a reshuffle
+        card.hide()
+        return card
+    def count(self, card):
+        """
+        Updates the count and the composition with a seen card
+        """
+        self.running_count += self.card_tags[card.code]
+        self.composition[CARD_RANK_INDEXES[card.code]] -= 1
+    def get_cards(self):
+        """
+        Retrieve the list of cards left to be dealt
+        """
+        return self.cards[self.position:]
+    def get_remaining(self):
+        """
+        Returns the number of cards left to be dealt
+        """
+        return len(self.cards) - self.position
+    def get_position(self):
+        return self.position
+    def get_shuffles(self):
+        """
+        Retrieve the number of times the shoe was shuffled, which numbers the current shoe
+        """
+        return self.shuffles
+    def set_cut_card(self, cut_card):
+        """
+        Places the cut card at the given position
+        """
+        self.cut_card = cut_card
+    def get_cut_card(self):
+        return self.cut_card
+    def set_counting_system(self, name):
+        """
+        Sets the counting system and counts the cards dealt so far.
+        Unbalanced systems (such as KO) start from a count of minus the
+        sum of a deck's tags for every deck after the first.
 
-class Card:
-    def __init__(self, suit, rank, is_shown = False):
+        <string> name       A key of COUNTING_SYSTEMS
+        """
+        tags = COUNTING_SYSTEMS[name]
+        self.counting_system = name
+        self.card_tags = tuple([tags[i] for i in CARD_RANK_INDEXES])
+        self.initial_count = -sum(self.card_tags) * (self.decks - 1)
+        # count the cards which were already seen
+        if hasattr(self, 'position'):
+            self.running_count = self.initial_count
+            for card in self.cards[:self.position]:
+                if card not in self.hidden:
+                    self.running_count += self.card_tags[card.code]
+    def get_counting_system(self):
+        return self.counting_system
+    def get_running_count(self):
+        """
+        Retrieve the count of the seen cards
+        """
+        return self.running_count
+    def get_true_count(self):
+        """
+        Returns the running count divided by the number of decks left
+        """
+        return self.running_count * 52.0 / max(1, self.get_remaining())
+    def get_composition(self):
+        """
+        Retrieve the number of cards left of each rank (A, 2, ..., K),
+        the cards dealt faced down are left until they are revealed
+        """
+        return tuple(self.composition)
+    def get_rank_count(self, rank_index):
+        """
+        Returns the number of cards left of the given rank index
+        """
+        return self.composition[rank_index]
+
+class Card(object):
+    __slots__ = ('code', 'is_shown', 'size', 'position', 'center_source', 'image_src', 'image', 'back_image_src', 'back_image')
+    def __init__(self, code, is_shown = False):
+        """
+        Creates a new card from its code, the suit, rank and values
+        are looked up in the card tables
+
+        <int> code
+        <bool> is_shown
+        """
+        self.code = code
         self.is_shown = is_shown
-        # sets the card's suit
-        self.set_suit(suit)
-        # sets the card's rank
-        self.set_rank(rank)
     def __str__(self):
         return self.get_suit() + ", " + self.get_rank()
     def set_image_src(self, image_src):
         """
         Sets the tiled-image src
         """
-        # load the image
+        # retrieve the shared image
         self.image_src = image_src
-        self.image = simplegui.load_image(self.image_src)
+        self.image = sprite_cache.load(self.image_src)
     def get_image_src(self):
         """
         Gets the tiled-image src
@@ -242,7 +1044,7 @@ class Card:
         return self.image
     def set_back_image_src(self, back_image_src):
         self.back_image_src = back_image_src
-        self.back_image = simplegui.load_image(self.back_image_src)
+        self.back_image = sprite_cache.load(self.back_image_src)
     def get_back_image_src(self):
         return self.back_image_src
     def get_back_image(self):
@@ -269,14 +1071,12 @@ class Card:
         """
         size = self.get_size()
         return (size[0] / 2, size[1] / 2)
-    def set_suit(self, suit):
-        self.suit = suit
+    def get_code(self):
+        return self.code
     def get_suit(self):
-        return self.suit
-    def set_rank(self, rank):
-        self.rank = rank
+        return CARD_SUITS[self.code]
     def get_rank(self):
-        return self.rank
+        return CARD_RANKS[self.code]
     def get_value(self, use_lower = False):
         """
         Calulates the value of the given card.
@@ -285,15 +1085,9 @@ class Card:
 
         Returns the possible value of the card
         """
-        if self.get_rank() == 'A':
-            if use_lower:
-                return 1
-            else:
-                return 11
-        elif self.get_rank() in ['J', 'Q', 'K']:
-            return 10
-        else:
-            return int(self.get_rank())
+        if use_lower:
+            return CARD_LOWER_VALUES[self.code]
+        return CARD_VALUES[self.code]
     def set_center_source(self, center_source):
         self.center_source = center_source
     def get_center_source(self):
@@ -342,8 +1136,21 @@ class Card:
         canvas.draw_image(image, center_source, width_height_source, center_dest, width_height_dest)
 
 class Hand:
-    def __init__(self, x, y, size, gutter_size):
+    def __init__(self, x = 0, y = 0, size = (0, 0), gutter_size = 0, dispatcher = None):
+        """
+        Creates a new hand. The draw handlers are only registered
+        when a dispatcher is given.
+
+        <int> x
+        <int> y
+        <tuple> size
+        <int> gutter_size
+        <Dispatcher> dispatcher
+        """
         self.cards = []
+        # running total with Aces counting as 1, and the number of Aces
+        self.hard_value = 0
+        self.aces = 0
         self.buttons = []
         self.x = x
         self.y = y
@@ -353,9 +1160,16 @@ class Hand:
         self.fill_color = 'gray'
         self.gutter_size = gutter_size
         self.is_playing = False
+        self.stand_handler = None
+        self.blackjack_handler = None
+        self.bust_handler = None
+        # the background never changes, the cards change when the hand changes
+        self.background_layer = Layer(self.draw_background)
+        self.cards_layer = Layer(self.draw_cards)
         # register the draw handlers
-        dispatcher.add('draw', self.draw_background)
-        dispatcher.add('draw', self.draw_cards)
+        if dispatcher:
+            dispatcher.add('draw', self.background_layer.draw)
+            dispatcher.add('draw', self.cards_layer.draw)
     def get_position(self):
         return (self.x, self.y)
     def get_size(self):
@@ -374,6 +1188,10 @@ class Hand:
         return self.deck
     def add_card(self, card):
         self.cards.append(card)
+        # update the running values
+        self.hard_value += CARD_LOWER_VALUES[card.code]
+        self.aces += CARD_ACES[card.code]
+        self.cards_layer.mark_dirty()
     def get_cards(self):
         return self.cards
     def reset(self):
@@ -382,17 +1200,21 @@ class Hand:
         """
         # reset cards
         self.cards = []
+        self.hard_value = 0
+        self.aces = 0
+        self.cards_layer.mark_dirty()
         # reset the playing flag
         self.is_playing = False
     def is_blackjack(self):
-        if self.get_value() == 21:
-            return True
-        return False
+        return self.hard_value + 10 * self.aces == 21
     def is_bust(self):
-        # if the lower and higher values are over 21
-        if self.get_value() > 21 and self.get_value(True) > 21:
-            return True
-        return False
+        # if the lower and higher values are over 21 (the lower value never exceeds the higher)
+        return self.hard_value > 21
+    def is_soft(self):
+        """
+        Returns True if an Ace can count as 11 without busting the hand
+        """
+        return self.aces > 0 and self.hard_value + 10 <= 21
     def check_hand(self):
         """
         Checks the hand and runs the appropriate handler
@@ -429,10 +1251,23 @@ class Hand:
 
         Returns the largest possible value of the hand
         """
-        sum = 0
-        for card in self.get_cards():
-            sum += card.get_value(use_lower)
-        return sum
+        if use_lower:
+            return self.hard_value
+        return self.hard_value + 10 * self.aces
+    def get_state(self):
+        """
+        Retrieve a key of the hand's state which tables can be indexed on:
+        value * 2 + 1 when soft (value * 2 otherwise), where values over 21
+        are counted as 22, or HAND_STATE_BUST when busted.
+
+        Returns an integer lower than HAND_STATES
+        """
+        if self.hard_value > 21:
+            return HAND_STATE_BUST
+        value = min(22, self.hard_value + 10 * self.aces)
+        if self.aces > 0 and self.hard_value + 10 <= 21:
+            return value * 2 + 1
+        return value * 2
     def calculate_position(self, card, card_number):
         """
         Calculates and return a tuple representing the position for the given card
@@ -460,13 +1295,6 @@ class Hand:
         for i in range(len(cards)):
             # retrieve the current card
             card = cards[i]
-            # calculate the card's position
-            # set's the image src
-            card.set_image_src(CARD_IMAGE_SRC)
-            # set's the card size
-            card.set_size(CARD_IMAGE_SIZE)
-            # set the center source
-            card.set_center_source(self.get_deck().calculate_center_position(card))
             # set the position
             card.set_position(self.calculate_position(card, i))
             # draw the card
@@ -490,12 +1318,23 @@ class Hand:
         self.bust_handler = bust_handler
 
 class PlayerHand(Hand):
+    def __init__(self, x = 0, y = 0, size = (0, 0), gutter_size = 0, dispatcher = None):
+        # calls the parent method
+        Hand.__init__(self, x, y, size, gutter_size, dispatcher)
+        self.deal_handler = None
+        self.deal_new_handler = None
+        self.hit_handler = None
+    def hit(self):
+        if self.hit_handler:
+            self.hit_handler()
+        # calls the parent method
+        Hand.hit(self)
     def deal(self):
         """
         Deals a new hand
         """
         # if currently playing
-        if self.is_playing:
+        if self.is_playing and self.deal_new_handler:
             # loses this round and calls the deal new handler
             self.deal_new_handler()
         # resets the deck
@@ -521,20 +1360,34 @@ class PlayerHand(Hand):
         self.deal_handler = deal_handler
     def set_deal_new_handler(self, deal_new_handler):
         self.deal_new_handler = deal_new_handler
+    def set_hit_handler(self, hit_handler):
+        self.hit_handler = hit_handler
 
 class AIHand(Hand):
+    def __init__(self, x = 0, y = 0, size = (0, 0), gutter_size = 0, dispatcher = None):
+        # calls the parent method
+        Hand.__init__(self, x, y, size, gutter_size, dispatcher)
+        # the rules deciding when the AI hits
+        self.rules = default_rules
+    def set_rules(self, rules):
+        self.rules = rules
+    def get_rules(self):
+        return self.rules
     def start(self):
         """
         Starts the AI hand.
 
-        While the hand is less than 17, keep hitting
+        Keep hitting while the rules ask for it (while the hand is less than 17 by default)
+        and the round isn't settled
         """
         self.is_playing = True
         # display all current cards
         for card in self.get_cards():
-            card.show()
-        # hit while less than 17
-        while self.get_value() < 17:
+            self.deck.reveal(card)
+        self.cards_layer.mark_dirty()
+        # hit while the rules ask for it
+        hits = self.rules.get_ai_hits()
+        while self.is_playing and hits[self.get_state()]:
             self.hit()
         # ends the hand
         self.stand()
@@ -544,16 +1397,501 @@ class AIHand(Hand):
         """
         # calls the parent method
         Hand.reset(self)
-        # deals 2 cards faced down
+        # deals 2 cards, the second one faced down
         card1 = self.deck.deal()
-        card2 = self.deck.deal()
+        card2 = self.deck.deal_hidden()
         card1.show()
         # add the new card to the hand
         self.add_card(card1)
         self.add_card(card2)
 
+class Rules(object):
+    def __init__(self, stand_on = 17, hit_soft_17 = False, twenty_one_wins = True, push_on_tie = False, blackjack_payout = 1, double = False, double_on = None):
+        """
+        Creates a new ruleset, the defaults are the game's original rules.
+        The rules are compiled once into lookup tables indexed by hand states
+        (see Hand.get_state) which the table consults instead of branching
+        on every rule.
+
+        <int> stand_on              The AI stands once its hand reaches this value (at most 21)
+        <bool> hit_soft_17          The AI hits a soft 17 (H17)
+        <bool> twenty_one_wins      The player wins as soon as the hand reaches 21,
+                                    the player stands on 21 otherwise
+        <bool> push_on_tie          Ties are pushed instead of lost
+        <float> blackjack_payout    Units won by a two-card 21
+        <bool> double               The player can double the bet on the first two cards
+        <tuple> double_on           Values of the hands which can be doubled, any value when omitted
+        """
+        # the AI would keep hitting a 21, which already settled the round
+        if stand_on > 21:
+            raise ValueError('the AI must stand on 21 or less: %r' % (stand_on,))
+        self.stand_on = stand_on
+        self.hit_soft_17 = hit_soft_17
+        self.twenty_one_wins = twenty_one_wins
+        self.push_on_tie = push_on_tie
+        self.blackjack_payout = blackjack_payout
+        self.double = double
+        self.double_on = double_on
+        self.compile()
+    def compile(self):
+        """
+        Builds the lookup tables of the rules
+        """
+        states = range(HAND_STATES)
+        # whether the AI hits, by state
+        self.ai_hits = tuple([self.is_ai_hit(state) for state in states])
+        # whether the player can double, by state
+        self.doubles = tuple([self.is_double(state) for state in states])
+        # (outcome, category) by player state * HAND_STATES + AI state
+        self.settlements = tuple([self.compare(player_state, ai_state) for player_state in states for ai_state in states])
+    def is_ai_hit(self, state):
+        if state == HAND_STATE_BUST:
+            return False
+        value = state // 2
+        return value < self.stand_on or (self.hit_soft_17 and state % 2 == 1 and value == 17)
+    def is_double(self, state):
+        if not self.double or state == HAND_STATE_BUST:
+            return False
+        return self.double_on is None or state // 2 in self.double_on
+    def compare(self, player_state, ai_state):
+        """
+        Compares the player's and the AI's hands
+
+        Returns a tuple (outcome, category)
+        """
+        if ai_state == HAND_STATE_BUST:
+            return (OUTCOME_WIN, CATEGORY_AI_BUST)
+        # hands over 21 are compared as 21, a busted player only gets here
+        # by standing after the round was settled
+        player_value = 21
+        if player_state != HAND_STATE_BUST:
+            player_value = min(21, player_state // 2)
+        ai_value = min(21, ai_state // 2)
+        if ai_state // 2 == 21 and not (self.push_on_tie and player_value == 21):
+            return (OUTCOME_LOSS, CATEGORY_AI_21)
+        if player_value > ai_value:
+            return (OUTCOME_WIN, CATEGORY_HIGHER)
+        if player_value == ai_value:
+            if self.push_on_tie:
+                return (OUTCOME_PUSH, CATEGORY_TIE)
+            return (OUTCOME_LOSS, CATEGORY_TIE)
+        return (OUTCOME_LOSS, CATEGORY_LOWER)
+    def get_ai_hits(self):
+        return self.ai_hits
+    def can_double(self, state):
+        return self.doubles[state]
+    def settle(self, player_state, ai_state):
+        """
+        Retrieve the (outcome, category) of the given hand states
+        """
+        return self.settlements[player_state * HAND_STATES + ai_state]
+    def get_twenty_one_wins(self):
+        return self.twenty_one_wins
+    def get_blackjack_payout(self):
+        return self.blackjack_payout
+
+class Table:
+    def __init__(self, deck = None, player_hand = None, ai_hand = None, dispatcher = None, rules = None):
+        """
+        Creates a new table which plays rounds between the player and the AI.
+        The table holds all of the game's rules and never renders anything,
+        headless hands and a shoe without images are created when none are given.
+        The table runs a 'settle' event with (outcome, message, category, units)
+        at the end of every round, the player's actions and the shoe position of the round
+        can be retrieved from its handlers.
+
+        <Deck> deck
+        <PlayerHand> player_hand
+        <AIHand> ai_hand
+        <Dispatcher> dispatcher     The table's events, a new dispatcher is created when omitted
+        <Rules> rules               The game's original rules when omitted
+        """
+        if dispatcher is None:
+            dispatcher = Dispatcher()
+        self.dispatcher = dispatcher
+        if deck is None:
+            deck = Shoe(SHOE_DECKS, SHOE_PENETRATION, False)
+        if player_hand is None:
+            player_hand = PlayerHand()
+        if ai_hand is None:
+            ai_hand = AIHand()
+        if rules is None:
+            rules = default_rules
+        self.rules = rules
+        ai_hand.set_rules(rules)
+        # associate the hands with the deck
+        player_hand.set_deck(deck)
+        ai_hand.set_deck(deck)
+        self.deck = deck
+        self.player_hand = player_hand
+        self.ai_hand = ai_hand
+        # keep track of the results
+        self.wins = 0
+        self.losses = 0
+        self.pushes = 0
+        self.units = 0
+        self.outcome = None
+        # units at stake in the current round
+        self.bet = 1
+        # actions of the player and (shoe, position) of the first card of the round
+        self.actions = []
+        self.round_position = (0, 0)
+        # placeholders for the handlers
+        self.deal_handler = None
+        self.stand_handler = None
+        self.win_handler = None
+        self.lost_handler = None
+        self.push_handler = None
+        # register the handler's for the player hand
+        self.player_hand.set_stand_handler(self.handle_player_stand)
+        self.player_hand.set_deal_handler(self.handle_player_deal)
+        self.player_hand.set_deal_new_handler(self.handle_deal_new)
+        self.player_hand.set_hit_handler(self.handle_player_hit)
+        self.player_hand.set_blackjack_handler(self.handle_player_blackjack)
+        self.player_hand.set_bust_handler(self.handle_player_bust)
+        # register AI hand's events
+        self.ai_hand.set_stand_handler(self.handle_compare_scores)
+        self.ai_hand.set_blackjack_handler(self.handle_ai_blackjack)
+        self.ai_hand.set_bust_handler(self.handle_ai_bust)
+    def get_deck(self):
+        return self.deck
+    def get_dispatcher(self):
+        return self.dispatcher
+    def get_player_hand(self):
+        return self.player_hand
+    def get_ai_hand(self):
+        return self.ai_hand
+    def get_wins(self):
+        return self.wins
+    def get_losses(self):
+        return self.losses
+    def get_pushes(self):
+        return self.pushes
+    def get_units(self):
+        """
+        Retrieve the net units won by the player
+        """
+        return self.units
+    def get_rules(self):
+        return self.rules
+    def get_bet(self):
+        return self.bet
+    def get_outcome(self):
+        """
+        Retrieve the outcome of the last round (None while it is being played)
+        """
+        return self.outcome
+    def get_actions(self):
+        """
+        Retrieve the actions (ACTION_HIT, ACTION_STAND, ACTION_DEAL_NEW or ACTION_DOUBLE) of the player in the current round
+        """
+        return self.actions
+    def get_round_position(self):
+        """
+        Retrieve the shoe number and the position in the shoe of the current
+        round's first card, (0, 0) when dealing from a plain deck
+        """
+        return self.round_position
+    def set_deal_handler(self, deal_handler):
+        self.deal_handler = deal_handler
+    def set_stand_handler(self, stand_handler):
+        self.stand_handler = stand_handler
+    def set_win_handler(self, win_handler):
+        self.win_handler = win_handler
+    def set_lost_handler(self, lost_handler):
+        self.lost_handler = lost_handler
+    def set_push_handler(self, push_handler):
+        self.push_handler = push_handler
+    def new_game(self):
+        """
+        Starts a new round, a round in play is lost
+        """
+        # deals a new hand
+        self.player_hand.deal()
+    def play_round(self, policy = None):
+        """
+        Plays a full round and returns its outcome
+
+        <callable> policy       Called with the table while the player is playing,
+                                returns True to hit. The player stands when omitted.
+        """
+        self.new_game()
+        # hit as long as the policy asks for it
+        while policy and self.player_hand.is_playing and policy(self):
+            self.player_hand.hit()
+        # ends the player's turn
+        if self.player_hand.is_playing:
+            self.player_hand.stand()
+        return self.outcome
+    def can_double(self):
+        """
+        Returns True if the player can double the bet of the current round
+        """
+        return (self.player_hand.is_playing and not self.ai_hand.is_playing and self.bet == 1
+            and len(self.player_hand.get_cards()) == 2 and self.rules.can_double(self.player_hand.get_state()))
+    def double(self):
+        """
+        Doubles the bet, the player takes exactly one more card then stands
+
+        Returns True if the bet was doubled
+        """
+        if not self.can_double():
+            return False
+        self.actions.append(ACTION_DOUBLE)
+        self.bet = 2
+        # deal the card without recording a hit
+        Hand.hit(self.player_hand)
+        if self.player_hand.is_playing:
+            self.end_player_turn()
+        return True
+    def play_rounds(self, rounds, quiet = True):
+        """
+        Plays a batch of rounds to completion in one call
+
+        <list> rounds       Each round is either a list of actions (ACTION_HIT,
+                            ACTION_STAND or ACTION_DOUBLE which hits when doubling
+                            isn't allowed, the player stands after the last one)
+                            or a policy (see play_round)
+        <bool> quiet        If set to True, the deal, stand, win and lost handlers
+                            (the game's notifications, buttons and scores) aren't
+                            called, the 'settle' event still runs
+
+        Returns an array of signed bytes (a list when unavailable) of the outcomes
+        """
+        results = array('b') if array else []
+        handlers = (self.deal_handler, self.stand_handler, self.win_handler, self.lost_handler, self.push_handler)
+        if quiet:
+            self.deal_handler = self.stand_handler = self.win_handler = self.lost_handler = self.push_handler = None
+        try:
+            for actions in rounds:
+                if callable(actions):
+                    results.append(self.play_round(actions))
+                    continue
+                self.new_game()
+                for action in actions:
+                    if not self.player_hand.is_playing:
+                        break
+                    if action == ACTION_HIT:
+                        self.player_hand.hit()
+                    elif action == ACTION_STAND:
+                        self.player_hand.stand()
+                    elif action == ACTION_DOUBLE:
+                        if not self.double():
+                            self.player_hand.hit()
+                    else:
+                        raise ValueError('unknown action: %r' % (action,))
+                # ends the player's turn
+                if self.player_hand.is_playing:
+                    self.player_hand.stand()
+                results.append(self.outcome)
+        finally:
+            self.deal_handler, self.stand_handler, self.win_handler, self.lost_handler, self.push_handler = handlers
+        return results
+    def handle_player_hit(self):
+        self.actions.append(ACTION_HIT)
+    def handle_player_stand(self):
+        self.actions.append(ACTION_STAND)
+        self.end_player_turn()
+    def end_player_turn(self):
+        if self.stand_handler:
+            self.stand_handler()
+        # starts the AI hand
+        self.ai_hand.start()
+    def handle_player_deal(self):
+        # the player's 2 cards have just been dealt, the last round was settled
+        self.outcome = None
+        self.actions = []
+        self.bet = 1
+        if isinstance(self.deck, Shoe):
+            self.round_position = (self.deck.get_shuffles(), max(0, self.deck.get_position() - 2))
+        if self.deal_handler:
+            self.deal_handler()
+        # resets the AI's hand
+        self.ai_hand.reset()
+    def handle_player_blackjack(self):
+        if self.rules.get_twenty_one_wins():
+            self.handle_player_win('You won! You have 21! New Deal?', CATEGORY_PLAYER_21)
+        elif self.player_hand.is_playing and not self.ai_hand.is_playing:
+            # the player stands on 21
+            self.end_player_turn()
+    def handle_player_bust(self):
+        self.handle_player_lost('You lost! You BUSTED! New Deal?', CATEGORY_PLAYER_BUST)
+    def handle_ai_blackjack(self):
+        self.settle_hands('You lost! New Deal?')
+    def handle_ai_bust(self):
+        self.settle_hands('You won! New Deal?')
+    def handle_compare_scores(self):
+        """
+        Compares the player and AI hand
+        """
+        if self.ai_hand.is_playing:
+            self.settle_hands()
+    def settle_hands(self, message = None):
+        """
+        Settles the round with the rules' outcome of the player's and the AI's hands
+
+        <string> message    Message of a won or lost round, the category's message when omitted
+        """
+        outcome, category = self.rules.settle(self.player_hand.get_state(), self.ai_hand.get_state())
+        if outcome == OUTCOME_PUSH:
+            self.handle_player_push(PUSH_MESSAGE, category)
+            return
+        if message is None:
+            message = SETTLE_MESSAGES[category]
+        if outcome == OUTCOME_WIN:
+            self.handle_player_win(message, category)
+        else:
+            self.handle_player_lost(message, category)
+    def handle_deal_new(self):
+        """
+        Player chooses to deal a new hand.
+        Loses the current hand, the player's hand then deals the new hand.
+        """
+        if self.player_hand.is_playing and not self.ai_hand.is_playing:
+            self.actions.append(ACTION_DEAL_NEW)
+            self.handle_player_lost('You lost! New Deal?', CATEGORY_DEAL_NEW)
+    def handle_player_win(self, message = 'You won! New Deal?', category = CATEGORY_HIGHER):
+        self.wins += 1
+        self.outcome = OUTCOME_WIN
+        units = self.bet
+        # a two-card 21 is paid by the rules
+        if self.bet == 1 and len(self.player_hand.get_cards()) == 2 and self.player_hand.is_blackjack():
+            units = self.rules.get_blackjack_payout()
+        self.units += units
+        # reset playing flags
+        self.player_hand.is_playing = False
+        self.ai_hand.is_playing = False
+        if self.win_handler:
+            self.win_handler(message)
+        self.dispatcher.run('settle', (OUTCOME_WIN, message, category, units))
+    def handle_player_lost(self, message = 'You lost! New Deal?', category = CATEGORY_LOWER):
+        self.losses += 1
+        self.outcome = OUTCOME_LOSS
+        self.units -= self.bet
+        # reset playing flags
+        self.player_hand.is_playing = False
+        self.ai_hand.is_playing = False
+        if self.lost_handler:
+            self.lost_handler(message)
+        self.dispatcher.run('settle', (OUTCOME_LOSS, message, category, -self.bet))
+    def handle_player_push(self, message = PUSH_MESSAGE, category = CATEGORY_TIE):
+        self.pushes += 1
+        self.outcome = OUTCOME_PUSH
+        # reset playing flags
+        self.player_hand.is_playing = False
+        self.ai_hand.is_playing = False
+        if self.push_handler:
+            self.push_handler(message)
+        self.dispatcher.run('settle', (OUTCOME_PUSH, message, category, 0))
+
+class Statistics:
+    def __init__(self):
+        """
+        Creates a new collector of the outcomes of the settled rounds. Only
+        running sums are kept (Welford's algorithm for the variance) so the
+        memory never grows with the number of rounds, and the statistics of
+        several tables or processes can be merged.
+        """
+        self.rounds = 0
+        self.units = 0 # net units won by the player
+        self.mean = 0.0
+        self.m2 = 0.0 # sum of the squared differences from the mean
+        self.histogram = {} # number of rounds per units won
+        self.categories = [0] * len(CATEGORIES)
+    def attach(self, table):
+        """
+        Collects the outcomes of the rounds settled by the table until it is
+        detached, the table's dispatcher keeps the collector alive
+        """
+        table.get_dispatcher().add('settle', self.handle_settle, weak=False)
+    def detach(self, table):
+        """
+        Stops collecting the outcomes of the table's rounds
+        """
+        table.get_dispatcher().remove('settle', self.handle_settle)
+    def handle_settle(self, result):
+        self.add(result[3], result[2])
+    def add(self, units, category = None):
+        """
+        Adds the outcome of a round
+
+        <float> units       Units won by the player
+        <int> category      One of the CATEGORY_ constants
+        """
+        self.rounds += 1
+        self.units += units
+        delta = units - self.mean
+        self.mean += delta / float(self.rounds)
+        self.m2 += delta * (units - self.mean)
+        self.histogram[units] = self.histogram.get(units, 0) + 1
+        if category is not None:
+            self.categories[category] += 1
+    def merge(self, other):
+        """
+        Adds the outcomes collected by another Statistics
+
+        Returns itself
+        """
+        if other.rounds == 0:
+            return self
+        rounds = self.rounds + other.rounds
+        delta = other.mean - self.mean
+        # combine the sums of squares of both sets (Chan et al.)
+        self.m2 += other.m2 + delta * delta * self.rounds * other.rounds / float(rounds)
+        self.mean += delta * other.rounds / float(rounds)
+        self.rounds = rounds
+        self.units += other.units
+        for units, count in other.histogram.items():
+            self.histogram[units] = self.histogram.get(units, 0) + count
+        for i in range(len(CATEGORIES)):
+            self.categories[i] += other.categories[i]
+        return self
+    def get_rounds(self):
+        return self.rounds
+    def get_units(self):
+        return self.units
+    def get_mean(self):
+        """
+        Retrieve the expected units won per round
+        """
+        return self.mean
+    def get_variance(self):
+        """
+        Retrieve the sample variance of the units won per round
+        """
+        if self.rounds < 2:
+            return 0.0
+        return self.m2 / (self.rounds - 1)
+    def get_standard_error(self):
+        """
+        Retrieve the standard error of the mean
+        """
+        if self.rounds == 0:
+            return 0.0
+        return (self.get_variance() / self.rounds) ** 0.5
+    def get_confidence_interval(self, z = CONFIDENCE_Z):
+        """
+        Retrieve the confidence interval of the mean as a tuple (low, high)
+
+        <float> z           z-score of the interval, 95% by default
+        """
+        margin = z * self.get_standard_error()
+        return (self.mean - margin, self.mean + margin)
+    def get_histogram(self):
+        """
+        Retrieve the number of rounds per units won
+        """
+        return self.histogram
+    def get_category_count(self, category):
+        return self.categories[category]
+    def get_categories(self):
+        """
+        Retrieve the number of rounds of each category keyed by their names
+        """
+        return dict(zip(CATEGORIES, self.categories))
+
 class ActionPanel:
-    def __init__(self, x, y, buttons_size, gutter_size = 5):
+    def __init__(self, x, y, buttons_size, gutter_size = 5, dispatcher = None, frame = None):
         """
         Creates a new action panel with action buttons: DEAL, HIT, and STAND
 
@@ -561,6 +1899,8 @@ class ActionPanel:
         <int> y
         <tuple> buttons_size
         <int> gutter_size
+        <Dispatcher> dispatcher
+        <Frame> frame
         """
         # set the positions
         self.x = x
@@ -571,8 +1911,11 @@ class ActionPanel:
         self.gutter_size = gutter_size
         # create a dictionary of buttons
         self.buttons = {}
+        self.dispatcher = dispatcher
+        self.frame = frame
         # register the draw handler
-        dispatcher.add('draw', self.draw_buttons)
+        if dispatcher:
+            dispatcher.add('draw', self.draw_buttons)
     def get_buttons_size(self):
         return self.buttons_size
     def add_button(self, name, text, size, handler):
@@ -585,7 +1928,7 @@ class ActionPanel:
         <callable> handler
         """
         # create a new button
-        button = Button(text, size, self.x, self.y + self.gutter_size, handler)
+        button = Button(text, size, self.x, self.y + self.gutter_size, handler, self.dispatcher, self.frame)
         # append to dictionary
         self.buttons[name] = button
         return button
@@ -605,12 +1948,12 @@ class ActionPanel:
             # set the button's offset position based on the given index
             button.set_offset(((button.get_width() + self.gutter_size) * i, 0))
             # draw the button
-            button.draw(canvas)
+            button.get_layer().draw(canvas)
             # increment counter
             i += 1
 
 class Button:
-    def __init__(self, text, size, x, y, click_handler):
+    def __init__(self, text, size, x, y, click_handler, dispatcher = None, frame = None):
         """
         Creates a new button and draws it on the canvas
 
@@ -619,6 +1962,8 @@ class Button:
         <int> c
         <int> y
         <callable> click_handler
+        <Dispatcher> dispatcher
+        <Frame> frame           Used to measure the text
         """
         # set the props
         self.text = text
@@ -631,20 +1976,29 @@ class Button:
         self.font_size = 16
         self.font_color = "white"
         self.is_disabled = False
+        self.offset = None
         self.click_handler = click_handler
+        self.frame = frame
+        # the button only changes when it's moved or (re-)enabled
+        self.layer = Layer(self.draw)
         # register the click handler
-        dispatcher.add('click', self.handle_click)
+        if dispatcher:
+            dispatcher.add('click', self.handle_click)
     def get_width(self):
         return self.size[0]
     def get_height(self):
         return self.size[1]
+    def get_layer(self):
+        return self.layer
     def set_offset(self, offset):
         """
         Sets an offset
 
         <tuple> offset
         """
-        self.offset = offset
+        if offset != self.offset:
+            self.offset = offset
+            self.layer.mark_dirty()
     def get_offset(self):
         return self.offset
     def get_points(self):
@@ -659,7 +2013,9 @@ class Button:
         ]
         return points
     def disable(self, flag):
-        self.is_disabled = flag
+        if flag != self.is_disabled:
+            self.is_disabled = flag
+            self.layer.mark_dirty()
     def handle_click(self, position):
         # if not disabled
         if not self.is_disabled:
@@ -681,22 +2037,25 @@ class Button:
         # draw the background
         canvas.draw_polygon(self.get_points(), self.line_width, line_color, fill_color)
         # calculate the text width
-        text_width = game.get_frame().get().get_canvas_textwidth(self.text, self.font_size)
+        text_width = self.frame.get_text_width(self.text, self.font_size)
         # calculate the text positions
         text_pos = (self.get_points()[3][0] + (self.get_width() - text_width) / 2, self.get_points()[3][1] - ((self.get_height() - self.font_size) / 2))
         # draw the text
         canvas.draw_text(self.text, text_pos, self.font_size, self.font_color)
 
 class Score:
-    def __init__(self, x, y, size):
+    def __init__(self, x, y, size, dispatcher = None):
         self.wins = 0
         self.losses = 0
         self.x = x
         self.y = y
         self.size = size
         self.display = True
+        # the score only changes when it's incremented, shown or hidden
+        self.layer = Layer(self.draw)
         # register draw handlers
-        dispatcher.add('draw', self.draw)
+        if dispatcher:
+            dispatcher.add('draw', self.layer.draw)
     def set_hand(self, hand):
         self.hand = hand
     def get_hand(self):
@@ -707,8 +2066,10 @@ class Score:
         return self.size
     def inc_wins(self):
         self.wins += 1
+        self.layer.mark_dirty()
     def inc_losses(self):
         self.losses += 1
+        self.layer.mark_dirty()
     def get_wins(self):
         return self.wins
     def get_losses(self):
@@ -719,8 +2080,10 @@ class Score:
         return "Losses: " + str(self.get_losses())
     def show(self):
         self.display = True
+        self.layer.mark_dirty()
     def hide(self):
         self.display = False
+        self.layer.mark_dirty()
     def draw(self, canvas):
         if self.display:
             # calculate the points of the score in the canvas
@@ -745,23 +2108,34 @@ class Notification:
         self.frame = frame
         self.text = text
         self.font_size = font_size
+        self.point = None
+    def get_point(self):
+        """
+        Calculates the position of the text, once per notification
+        """
+        if self.point is None:
+            text_width = self.frame.get_text_width(self.text, self.font_size)
+            self.point = ((self.frame.get_width() - text_width) / 2, (self.frame.get_height() - self.font_size) / 2)
+        return self.point
     def draw(self, canvas):
-        text_width = self.frame.get().get_canvas_textwidth(self.text, self.font_size)
-        point = ((self.frame.get_width() - text_width) / 2, (self.frame.get_height() - self.font_size) / 2)
-        canvas.draw_text(self.text, point, self.font_size, 'yellow')
+        canvas.draw_text(self.text, self.get_point(), self.font_size, 'yellow')
 
 class BlackjackGame(Game):
-    def __init__(self, size, hand_gutter_size, buttons_size):
+    def __init__(self, size, hand_gutter_size, buttons_size, dispatcher = None, rules = None):
         # calls parent method
-        Game.__init__(self, size)
+        Game.__init__(self, size, dispatcher)
+        self.rules = rules
         # creates an empty placeholder prop for notifications
         self.notification = None
         # sets the hand's gutter size
         self.set_hand_gutter_size(hand_gutter_size)
         # set the buttons' size
         self.set_buttons_size(buttons_size)
+        # the title is drawn once and replayed afterwards
+        self.title_layer = Layer(self.draw_title)
+        self.notification_layer = Layer(self.draw_notification)
         # draw the title
-        dispatcher.add('draw', self.draw_title)
+        self.dispatcher.add('draw', self.title_layer.draw)
     def set_hand_gutter_size(self, hand_gutter_size):
         self.hand_gutter_size = hand_gutter_size
     def get_hand_gutter_size(self):
@@ -772,9 +2146,9 @@ class BlackjackGame(Game):
         return self.buttons_size
     def create_deck(self):
         """
-        Creates and return a new deck of cards
+        Creates and return a new shoe of cards
         """
-        deck = Deck()
+        deck = Shoe(SHOE_DECKS, SHOE_PENETRATION)
         return deck
     def create_player_hand(self, deck, score):
         """
@@ -792,7 +2166,7 @@ class BlackjackGame(Game):
         x = score_position[0]
         y = score_position[1] + score_size[1] + 5
         size = (500, 106)
-        hand = PlayerHand(x, y, size, self.get_hand_gutter_size())
+        hand = PlayerHand(x, y, size, self.get_hand_gutter_size(), self.dispatcher)
         hand.set_deck(deck)
         return hand
     def create_ai_hand(self, deck, score):
@@ -810,7 +2184,7 @@ class BlackjackGame(Game):
         x = score_position[0]
         y = score_position[1] + score_size[1] + 5
         size = (500, 106)
-        hand = AIHand(x, y, size, self.get_hand_gutter_size())
+        hand = AIHand(x, y, size, self.get_hand_gutter_size(), self.dispatcher)
         hand.set_deck(deck)
         return hand
     def create_player_actions(self, hand):
@@ -824,7 +2198,7 @@ class BlackjackGame(Game):
         # retrieve the hand's size
         hand_size = hand.get_size()
         # create the player actions
-        player_actions = ActionPanel(hand_pos[0], hand_pos[1] + hand_size[1], self.get_buttons_size())
+        player_actions = ActionPanel(hand_pos[0], hand_pos[1] + hand_size[1], self.get_buttons_size(), 5, self.dispatcher, self.get_frame())
         # create buttons for the panel
         player_actions.add_button('Deal', 'Deal', self.get_buttons_size(), hand.deal)
         player_actions.add_button('Hit', 'Hit', self.get_buttons_size(), hand.hit)
@@ -834,8 +2208,8 @@ class BlackjackGame(Game):
     def start(self):
         self.deck = self.create_deck()
         # create the score boards
-        self.player_score = Score(50, 50, (500, 30))
-        self.ai_score = Score(50, 400, (500, 30))
+        self.player_score = Score(50, 50, (500, 30), self.dispatcher)
+        self.ai_score = Score(50, 400, (500, 30), self.dispatcher)
         self.ai_score.hide()
         # create a new player and AI hand
         self.player_hand = self.create_player_hand(self.deck, self.player_score)
@@ -843,16 +2217,14 @@ class BlackjackGame(Game):
         self.ai_hand = self.create_ai_hand(self.deck, self.ai_score)
         # bind the player and AI hands to the score
         self.player_score.set_hand(self.player_hand)
-        # register the handler's for the given hand
-        self.player_hand.set_stand_handler(self.handle_player_stand)
-        self.player_hand.set_deal_handler(self.handle_player_deal)
-        self.player_hand.set_deal_new_handler(self.handle_deal_new)
-        self.player_hand.set_blackjack_handler(self.handle_player_blackjack)
-        self.player_hand.set_bust_handler(self.handle_player_bust)
-        # register AI hand's events
-        self.ai_hand.set_stand_handler(self.handle_compare_scores)
-        self.ai_hand.set_blackjack_handler(self.handle_player_lost)
-        self.ai_hand.set_bust_handler(self.handle_player_win)
+        # create the table which plays the rounds
+        self.table = Table(self.deck, self.player_hand, self.ai_hand, self.dispatcher, self.rules)
+        # register the table's handlers
+        self.table.set_stand_handler(self.handle_player_stand)
+        self.table.set_deal_handler(self.handle_player_deal)
+        self.table.set_win_handler(self.handle_player_win)
+        self.table.set_lost_handler(self.handle_player_lost)
+        self.table.set_push_handler(self.handle_player_push)
         # starts a new game
         self.new_game()
         # create the frame controls
@@ -861,7 +2233,7 @@ class BlackjackGame(Game):
         self.get_frame().add_button('Stand', self.player_hand.stand)
         # display the notification
         self.display_notification('Hit or Stand?')
-        dispatcher.add('draw', self.draw_notification)
+        self.dispatcher.add('draw', self.notification_layer.draw)
         # starts the frame
         self.get_frame().start()
     def handle_player_stand(self):
@@ -870,8 +2242,6 @@ class BlackjackGame(Game):
         # disable buttons
         self.player_actions.get_button('Hit').disable(True)
         self.player_actions.get_button('Stand').disable(True)
-        # starts the AI hand
-        self.ai_hand.start()
     def handle_player_deal(self):
         # enable buttons
         self.player_actions.get_button('Hit').disable(False)
@@ -880,42 +2250,12 @@ class BlackjackGame(Game):
         if self.notification:
             del self.notification
             self.display_notification('Hit or Stand?')
-        # resets the AI's hand
-        self.ai_hand.reset()
-    def handle_player_blackjack(self):
-        self.handle_player_win('You won! You have 21! New Deal?')
-    def handle_player_bust(self):
-        self.handle_player_lost('You lost! You BUSTED! New Deal?');
-    def handle_compare_scores(self):
-        """
-        Compares the player and AI hand
-        """
-        if self.ai_hand.is_playing:
-            if self.ai_hand.is_blackjack():
-                self.handle_player_lost('You lost! AI has 21! New Deal?')
-            elif self.ai_hand.is_bust():
-                self.handle_player_win('You won! AI busted! New Deal?')
-            elif max(0, min(21, self.player_hand.get_value())) > max(0, min(21, self.ai_hand.get_value())):
-                self.handle_player_win('You won! New Deal?')
-            else:
-                self.handle_player_lost('You lost! New Deal?')
-    def handle_deal_new(self):
-        """
-        Player chooses to deal a new hand.
-        Loses the current hand and deals a new hand.
-        """
-        if self.player_hand.is_playing and not self.ai_hand.is_playing:
-            self.handle_player_lost('You lost! New Deal?')
-            self.new_game()
     def handle_player_win(self, message = 'You won! New Deal?'):
         self.player_score.inc_wins()
         self.ai_score.inc_losses()
         # disable buttons
         self.player_actions.get_button('Hit').disable(True)
         self.player_actions.get_button('Stand').disable(True)
-        # reset playing flags
-        self.player_hand.is_playing = False
-        self.ai_hand.is_playing = False
         # display notification
         self.display_notification(message)
     def handle_player_lost(self, message = 'You lost! New Deal?'):
@@ -924,9 +2264,12 @@ class BlackjackGame(Game):
         # disable buttons
         self.player_actions.get_button('Hit').disable(True)
         self.player_actions.get_button('Stand').disable(True)
-        # reset playing flags
-        self.player_hand.is_playing = False
-        self.ai_hand.is_playing = False
+        # display notification
+        self.display_notification(message)
+    def handle_player_push(self, message = PUSH_MESSAGE):
+        # disable buttons
+        self.player_actions.get_button('Hit').disable(True)
+        self.player_actions.get_button('Stand').disable(True)
         # display notification
         self.display_notification(message)
     def new_game(self):
@@ -934,9 +2277,10 @@ class BlackjackGame(Game):
         Starts a new game
         """
         # deals a new hand
-        self.player_hand.deal()
+        self.table.new_game()
     def display_notification(self, text):
         self.notification = Notification(self.get_frame(), text)
+        self.notification_layer.mark_dirty()
     def draw_notification(self, canvas):
         # draw notification if it exists
         if self.notification:
@@ -944,13 +2288,47 @@ class BlackjackGame(Game):
     def draw_title(self, canvas):
         text = "Blackjack"
         font_size = 30
-        text_width = self.get_frame().get().get_canvas_textwidth(text, font_size)
+        text_width = self.get_frame().get_text_width(text, font_size)
         point = ((self.get_window_width() - text_width) / 2, font_size + 10)
         canvas.draw_text(text, point, font_size, 'white')
 
 
 
+# the images are shared by every card of the process
+sprite_cache = SpriteCache()
+card_atlas = Atlas(CARD_IMAGE_SRC, CARD_BACK_IMAGE_SRC, CARD_IMAGE_SIZE)
+# the game's original rules
+default_rules = Rules()
+# frames and images are created by the headless backend until main selects another one
+backend = HeadlessBackend()
+
+def set_backend(new_backend):
+    """
+    Selects the backend creating the frames and loading the images
+
+    <SimpleGUIBackend|HeadlessBackend> new_backend
+    """
+    global backend
+    backend = new_backend
+    # images loaded by the previous backend can't be drawn by the new one
+    sprite_cache.clear()
+
+def get_backend():
+    return backend
+
+def main(new_backend = None):
+    """
+    Starts the game, with simplegui unless another backend is given
+
+    Returns the BlackjackGame instance
+    """
+    if new_backend is None:
+        new_backend = SimpleGUIBackend()
+    set_backend(new_backend)
+    game = BlackjackGame(GAME_WINDOW_SIZE, HAND_GUTTER_SIZE, BUTTONS_SIZE)
+    game.start()
+    return game
+
 # bootstrap
-dispatcher = Dispatcher()
-game = BlackjackGame(GAME_WINDOW_SIZE, HAND_GUTTER_SIZE, BUTTONS_SIZE)
-game.start()
+if __name__ == '__main__':
+    main()
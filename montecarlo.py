@@ -0,0 +1,126 @@
+"""
+Parallel Monte Carlo runs of the game's rounds. The rounds are split in
+fixed-size chunks, each chunk plays on its own table with a random stream
+derived from the master seed, so the merged results only depend on the
+master seed and not on the number of workers.
+
+Usage: python montecarlo.py ROUNDS [--seed SEED] [--workers WORKERS] [--hit-below VALUE] [--rng random|pcg64|philox] [--corpus PATH] [--push-on-tie]
+"""
+
+# import modules
+
+import argparse, hashlib, random, game
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_ROUNDS = 10000 # number of rounds played by each chunk
+RESULT_KEYS = ('rounds', 'wins', 'losses', 'pushes', 'ties', 'busts', 'ai_busts')
+GENERATORS = ('random', 'pcg64', 'philox') # the random module's generator or NumPy's bit generators
+
+def derive_seed(master_seed, chunk):
+    """
+    Derives the seed of a chunk's random stream from the master seed
+
+    <int> master_seed
+    <int> chunk             The index of the chunk
+    """
+    digest = hashlib.sha256(("%d:%d" % (master_seed, chunk)).encode()).digest()
+    return int.from_bytes(digest[:16], 'big')
+
+def play_chunk(job):
+    """
+    Plays the rounds of a chunk and returns its partial results
+
+    <tuple> job             (seed, rounds, hit_below, decks, penetration, generator, corpus_path, chunk, chunks, rules)
+    """
+    seed, rounds, hit_below, decks, penetration, generator, corpus_path, chunk, chunks, rules = job
+    if corpus_path:
+        # every chunk deals its own share of the corpus' shoes
+        import corpus
+        shoes = corpus.Corpus(corpus_path)
+        stream = corpus.CorpusRandom(shoes, chunk, chunks)
+        decks = shoes.get_decks()
+    elif generator == 'random':
+        stream = random.Random(seed)
+    else:
+        # NumPy is only needed by its generators
+        import rng
+        stream = rng.NumpyRandom(seed, generator)
+    table = game.Table(game.Shoe(decks, penetration, False, None, stream), rules=rules)
+    statistics = game.Statistics()
+    statistics.attach(table)
+    player_hand = table.get_player_hand()
+    policy = None
+    if hit_below:
+        policy = lambda t: player_hand.get_value() < hit_below
+    for i in range(rounds):
+        table.play_round(policy)
+    # the settlement categories tell ties (lost or pushed, see Rules) and busts apart
+    categories = statistics.get_categories()
+    result = dict.fromkeys(RESULT_KEYS, 0)
+    result['rounds'] = rounds
+    result['wins'] = table.get_wins()
+    result['losses'] = table.get_losses()
+    result['pushes'] = table.get_pushes()
+    result['ties'] = categories['tie']
+    result['busts'] = categories['player_bust']
+    result['ai_busts'] = categories['ai_bust']
+    result['statistics'] = statistics
+    return result
+
+def merge(results):
+    """
+    Sums the partial results of the chunks and merges their statistics
+    """
+    merged = dict.fromkeys(RESULT_KEYS, 0)
+    merged['statistics'] = game.Statistics()
+    for result in results:
+        for key in RESULT_KEYS:
+            merged[key] += result[key]
+        merged['statistics'].merge(result['statistics'])
+    return merged
+
+def run(rounds, seed = 0, workers = None, hit_below = None, decks = game.SHOE_DECKS, penetration = game.SHOE_PENETRATION, chunk_rounds = CHUNK_ROUNDS, generator = 'random', corpus_path = None, rules = None):
+    """
+    Plays the given number of rounds across a pool of processes and
+    returns the merged results
+
+    <int> rounds
+    <int> seed              The master seed
+    <int> workers           Number of processes, defaults to the number of CPUs (1 runs in-process)
+    <int> hit_below         The player hits while the hand is lower than this value, stands when omitted
+    <int> decks
+    <float> penetration
+    <int> chunk_rounds
+    <string> generator      A name of GENERATORS
+    <string> corpus_path    Deals the shoes of this corpus (see corpus.py) instead of shuffling
+    <Rules> rules           Defaults to the game's original rules
+    """
+    jobs = []
+    chunks = (rounds + chunk_rounds - 1) // chunk_rounds
+    for chunk in range(0, chunks):
+        size = min(chunk_rounds, rounds - chunk * chunk_rounds)
+        jobs.append((derive_seed(seed, chunk), size, hit_below, decks, penetration, generator, corpus_path, chunk, chunks, rules))
+    if workers == 1:
+        return merge(map(play_chunk, jobs))
+    with ProcessPoolExecutor(workers) as executor:
+        return merge(executor.map(play_chunk, jobs))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plays rounds of blackjack across processes.')
+    parser.add_argument('rounds', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--hit-below', type=int, default=None)
+    parser.add_argument('--decks', type=int, default=game.SHOE_DECKS)
+    parser.add_argument('--penetration', type=float, default=game.SHOE_PENETRATION)
+    parser.add_argument('--rng', choices=GENERATORS, default='random')
+    parser.add_argument('--corpus', default=None, help='deals the shoes of this corpus instead of shuffling')
+    parser.add_argument('--push-on-tie', action='store_true', help='pushes the ties instead of losing them')
+    args = parser.parse_args()
+    result = run(args.rounds, args.seed, args.workers, args.hit_below, args.decks, args.penetration, CHUNK_ROUNDS, args.rng, args.corpus,
+        game.Rules(push_on_tie=args.push_on_tie))
+    for key in RESULT_KEYS:
+        print("%s: %d" % (key, result[key]))
+    statistics = result['statistics']
+    low, high = statistics.get_confidence_interval()
+    print("units per round: %.5f (95%% CI %.5f to %.5f)" % (statistics.get_mean(), low, high))
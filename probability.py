@@ -0,0 +1,120 @@
+"""
+Exact probabilities of the AI's (dealer's) final hand under the game's
+rules: the AI draws its hole card then hits while its hand is lower than 17
+(and on a soft 17 with H17), with Aces counting as 11 as in Hand.get_value.
+
+A composition is a tuple of the number of cards left per rank:
+Ace, 2, 3, 4, 5, 6, 7, 8, 9 and ten-valued cards (10, J, Q, K). The 13 ranks
+of Shoe.get_composition are folded into these 10 (see fold_composition).
+"""
+
+# import modules
+
+import game
+
+RANK_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+RANK_LOWER_VALUES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+CARD_RANKS = tuple([min(i, 9) for i in game.CARD_RANK_INDEXES]) # rank of each card code
+OUTCOMES = (17, 18, 19, 20, 21, 'bust') # outcomes in the order of the returned probabilities
+BUST = 5 # index of the bust probability
+
+def shoe_composition(decks = game.SHOE_DECKS):
+    """
+    Returns the composition of a full shoe
+    """
+    return (4 * decks,) * 9 + (16 * decks,)
+
+def composition_from_cards(cards):
+    """
+    Returns the composition of the given list of cards
+
+    <list> cards
+    """
+    counts = [0] * 10
+    for card in cards:
+        counts[CARD_RANKS[card.code]] += 1
+    return tuple(counts)
+
+def fold_composition(composition):
+    """
+    Returns the composition of 10 ranks, the ten-valued ranks of a
+    composition of 13 ranks (such as Shoe.get_composition) are added up
+    """
+    if len(composition) == 10:
+        return tuple(composition)
+    if len(composition) == 13:
+        return tuple(composition[:9]) + (sum(composition[9:]),)
+    raise ValueError('a composition has 10 or 13 ranks, not %d' % len(composition))
+
+def remove_card(composition, rank):
+    """
+    Returns the composition without one card of the given rank
+    """
+    counts = list(composition)
+    counts[rank] -= 1
+    return tuple(counts)
+
+class DealerOutcomes:
+    def __init__(self, stand_on = 17, hit_soft_17 = False):
+        """
+        Creates a new probability engine. The probabilities are memoized
+        on the composition and the AI's hand so that repeated queries are cheap.
+
+        <int> stand_on      The AI stands once its hand reaches this value
+        <bool> hit_soft_17  The AI hits a soft 17
+        """
+        self.stand_on = stand_on
+        self.hit_soft_17 = hit_soft_17
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+    def get(self, upcard, composition):
+        """
+        Calculates the probability of each final outcome of the AI
+
+        <int> upcard            Rank of the AI's upcard (0 for Aces, 9 for ten-valued cards)
+        <tuple> composition     Cards left in the shoe, without the upcard (10 or 13 ranks)
+
+        Returns a tuple of probabilities ordered as OUTCOMES
+        """
+        return self.draw(fold_composition(composition), RANK_LOWER_VALUES[upcard], 1 if upcard == 0 else 0)
+    def draw(self, composition, hard_value, aces):
+        """
+        Returns the outcome probabilities of a hand with the given
+        lower value and number of Aces, drawing from the composition
+        """
+        value = hard_value + 10 * aces
+        soft_17 = self.hit_soft_17 and value == 17 and aces > 0 and hard_value + 10 <= 21
+        # the AI stands
+        if value >= self.stand_on and not soft_17:
+            outcomes = [0.0] * 6
+            if hard_value > 21:
+                outcomes[BUST] = 1.0
+            else:
+                # hands over 21 which aren't busted are compared as 21
+                outcomes[min(21, value) - 17] = 1.0
+            return tuple(outcomes)
+        key = (composition, hard_value, aces)
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key]
+        self.misses += 1
+        outcomes = [0.0] * 6
+        total = float(sum(composition))
+        for rank in range(10):
+            count = composition[rank]
+            if count:
+                drawn = self.draw(remove_card(composition, rank), hard_value + RANK_LOWER_VALUES[rank], aces + (1 if rank == 0 else 0))
+                probability = count / total
+                for i in range(6):
+                    outcomes[i] += probability * drawn[i]
+        outcomes = tuple(outcomes)
+        self.cache[key] = outcomes
+        return outcomes
+    def clear(self):
+        """
+        Forgets all of the memoized probabilities
+        """
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
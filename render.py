@@ -0,0 +1,135 @@
+"""
+Rasterizes the display lists recorded by game.RecordingCanvas offscreen
+with Pillow, e.g. to render thumbnails of archived hands in bulk.
+
+Images are looked up by their source in the given mapping of PIL images
+(the card sheets), missing images are drawn as blank cards.
+"""
+
+# import modules
+
+import os, game
+from PIL import Image, ImageDraw, ImageFont
+
+PLAYER_HAND_POSITION = (50, 85) # same places as in the game window
+AI_HAND_POSITION = (50, 435)
+HAND_SIZE = (500, 106)
+
+fonts = {}
+
+def get_font(size):
+    """
+    Returns the default font of the given size, loaded once per size
+    """
+    if size not in fonts:
+        try:
+            fonts[size] = ImageFont.load_default(size)
+        except TypeError:
+            # older Pillow versions only have a fixed-size default font
+            fonts[size] = ImageFont.load_default()
+    return fonts[size]
+
+def open_images(paths):
+    """
+    Opens the card sheets
+
+    <dict> paths        Maps an image source (e.g. game.CARD_IMAGE_SRC) to a local file
+
+    Returns a dictionary mapping the sources to PIL images
+    """
+    return dict([(src, Image.open(path).convert('RGBA')) for src, path in paths.items()])
+
+def draw_image(image, draw, images, image_src, center_source, width_height_source, center_dest, width_height_dest, rotation = 0):
+    # top left corner of the destination
+    left = int(round(center_dest[0] - width_height_dest[0] / 2.0))
+    top = int(round(center_dest[1] - width_height_dest[1] / 2.0))
+    source = images.get(image_src)
+    if source is None:
+        draw.rectangle([left, top, left + width_height_dest[0] - 1, top + width_height_dest[1] - 1], 'white', 'gray')
+        return
+    box = (int(center_source[0] - width_height_source[0] / 2.0), int(center_source[1] - width_height_source[1] / 2.0))
+    tile = source.crop((box[0], box[1], box[0] + int(width_height_source[0]), box[1] + int(width_height_source[1])))
+    tile = tile.resize((int(width_height_dest[0]), int(width_height_dest[1])))
+    if rotation:
+        tile = tile.rotate(-rotation * 180 / 3.141592653589793)
+    image.paste(tile, (left, top), tile)
+
+def rasterize(commands, size, images = None, background = 'black'):
+    """
+    Draws a display list into a new image
+
+    <list> commands     Display list of a RecordingCanvas
+    <tuple> size        Size of the canvas
+    <dict> images       Maps the image sources to PIL images
+    <string> background
+
+    Returns the PIL image
+    """
+    if images is None:
+        images = {}
+    image = Image.new('RGBA', (int(size[0]), int(size[1])), background)
+    draw = ImageDraw.Draw(image)
+    for command, args in commands:
+        if command == game.DRAW_IMAGE:
+            draw_image(image, draw, images, getattr(args[0], 'src', None), *args[1:])
+        elif command == game.DRAW_POLYGON:
+            fill_color = args[3] if len(args) > 3 else None
+            draw.polygon([tuple(point) for point in args[0]], fill_color, args[2], int(args[1]))
+        elif command == game.DRAW_TEXT:
+            # simplegui places the text from its baseline on the left
+            draw.text(tuple(args[1]), args[0], args[3], get_font(int(args[2])), anchor='ls')
+        elif command == game.DRAW_LINE:
+            draw.line([tuple(args[0]), tuple(args[1])], args[3], int(args[2]))
+        elif command == game.DRAW_POLYLINE:
+            draw.line([tuple(point) for point in args[0]], args[2], int(args[1]))
+        elif command == game.DRAW_CIRCLE:
+            center, radius = args[0], args[1]
+            fill_color = args[4] if len(args) > 4 else None
+            draw.ellipse([center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius], fill_color, args[3], int(args[2]))
+        elif command == game.DRAW_POINT:
+            draw.point(tuple(args[0]), args[1])
+    return image
+
+def record_hands(player_codes, ai_codes):
+    """
+    Records the display list of a player and an AI hand, all of the cards shown
+
+    <list> player_codes     Card codes of the player's hand
+    <list> ai_codes         Card codes of the AI's hand
+
+    Returns the RecordingCanvas
+    """
+    deck = game.Deck()
+    canvas = game.RecordingCanvas()
+    for position, codes in ((PLAYER_HAND_POSITION, player_codes), (AI_HAND_POSITION, ai_codes)):
+        hand = game.Hand(position[0], position[1], HAND_SIZE, game.HAND_GUTTER_SIZE)
+        for code in codes:
+            card = deck.get_cards()[code]
+            card.show()
+            hand.add_card(card)
+        hand.draw_background(canvas)
+        hand.draw_cards(canvas)
+    return canvas
+
+def render_thumbnails(rounds, directory, images = None, scale = 0.25):
+    """
+    Renders a PNG thumbnail of each round's hands
+
+    <list> rounds           (player card codes, AI card codes) of each round
+    <string> directory
+    <dict> images           Maps the image sources to PIL images
+    <float> scale
+
+    Returns the paths of the thumbnails
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    size = (int(game.GAME_WINDOW_WIDTH * scale), int(game.GAME_WINDOW_HEIGHT * scale))
+    paths = []
+    for i, (player_codes, ai_codes) in enumerate(rounds):
+        canvas = record_hands(player_codes, ai_codes)
+        image = rasterize(canvas.get_commands(), game.GAME_WINDOW_SIZE, images)
+        path = os.path.join(directory, 'round-%d.png' % i)
+        image.resize(size).save(path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,105 @@
+"""
+Random number generators backed by NumPy's Generator (PCG64 or Philox)
+which can be given to Deck and Shoe in place of the random module.
+
+Random numbers are generated in bulk and served from buffers refilled in
+chunks: uniform floats for randrange and whole permutations for shuffle.
+The streams are reproducible from their seed, and independent streams are
+created by jumping ahead (see NumpyRandom.jumped and streams).
+
+    shoe = game.Shoe(rng=rng.NumpyRandom(42))
+"""
+
+# import modules
+
+import numpy
+
+BIT_GENERATORS = {'pcg64': numpy.random.PCG64, 'philox': numpy.random.Philox}
+BUFFER_SIZE = 65536 # random floats generated at once
+SHUFFLE_BUFFER_SIZE = 64 # permutations generated at once per number of items
+
+class NumpyRandom:
+    def __init__(self, seed = None, bit_generator = 'pcg64', buffer_size = BUFFER_SIZE, shuffle_buffer_size = SHUFFLE_BUFFER_SIZE):
+        """
+        Creates a new random stream
+
+        <int> seed                  Fresh entropy is used when omitted
+        <string> bit_generator      A key of BIT_GENERATORS
+        <int> buffer_size
+        <int> shuffle_buffer_size
+        """
+        self.name = bit_generator
+        self.buffer_size = buffer_size
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.set_bit_generator(BIT_GENERATORS[bit_generator](seed))
+    def set_bit_generator(self, bit_generator):
+        """
+        Draws the random numbers from the given bit generator, the buffers are emptied
+        """
+        self.bit_generator = bit_generator
+        self.generator = numpy.random.Generator(bit_generator)
+        self.floats = []
+        self.index = 0
+        # (permutations, next row) keyed by the number of items
+        self.permutations = {}
+    def seed(self, seed = None):
+        """
+        Restarts the stream from the given seed
+        """
+        self.set_bit_generator(BIT_GENERATORS[self.name](seed))
+    def jumped(self, jumps = 1):
+        """
+        Returns a new stream which is independent from this one, as if the
+        bit generator had drawn 2 ** 128 (PCG64) or 2 ** 256 (Philox) numbers per jump
+        """
+        stream = NumpyRandom(None, self.name, self.buffer_size, self.shuffle_buffer_size)
+        stream.set_bit_generator(self.bit_generator.jumped(jumps))
+        return stream
+    def get_generator(self):
+        return self.generator
+    def random(self):
+        """
+        Returns a random float in [0, 1)
+        """
+        if self.index == len(self.floats):
+            # refill the buffer, tolist gives Python floats which are faster to serve
+            self.floats = self.generator.random(self.buffer_size).tolist()
+            self.index = 0
+        value = self.floats[self.index]
+        self.index += 1
+        return value
+    def randrange(self, start, stop = None):
+        """
+        Returns a random integer in [start, stop), or in [0, start) when stop is omitted
+        """
+        if stop is None:
+            start, stop = 0, start
+        return start + int(self.random() * (stop - start))
+    def shuffle(self, items):
+        """
+        Shuffles the list in place
+        """
+        count = len(items)
+        permutations, row = self.permutations.get(count, (None, 0))
+        if permutations is None or row == len(permutations):
+            # permute every row of a block of identical rows at once
+            block = numpy.tile(numpy.arange(count), (self.shuffle_buffer_size, 1))
+            permutations = self.generator.permuted(block, axis=1).tolist()
+            row = 0
+        self.permutations[count] = (permutations, row + 1)
+        items[:] = [items[i] for i in permutations[row]]
+
+def streams(seed, count, bit_generator = 'pcg64'):
+    """
+    Returns a list of independent streams of the given seed, each one
+    jumped ahead of the previous one
+
+    <int> seed
+    <int> count
+    <string> bit_generator
+    """
+    stream = NumpyRandom(seed, bit_generator)
+    result = [stream]
+    for i in range(1, count):
+        result.append(stream.jumped(i))
+    return result
@@ -0,0 +1,155 @@
+"""
+Append-only binary log of the played rounds. Every round is written as a
+fixed-width 64-byte record after a 64-byte header, the records are buffered
+and written in batches. The reader maps the file in memory and returns a
+NumPy structured array viewing the records without copying them.
+
+    log = roundlog.RoundLog('rounds.log', seed=42)
+    log.attach(table)
+    ...
+    log.close()
+    records = roundlog.read('rounds.log')
+    win_rate = (records['outcome'] == game.OUTCOME_WIN).mean()
+"""
+
+# import modules
+
+import mmap, os, struct, time
+import numpy
+
+MAGIC = b'BJRL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ') # magic, version, record size, seed
+HEADER_SIZE = 64
+MAX_CARDS = 12 # cards kept per hand, the counts hold the actual number of cards
+MAX_ACTIONS = 12
+BATCH_ROUNDS = 4096 # rounds buffered before they are written
+RECORD = struct.Struct('<dQIIb3B%ds%ds%ds' % (MAX_CARDS, MAX_CARDS, MAX_ACTIONS))
+RECORD_DTYPE = numpy.dtype([
+    ('timestamp', '<f8'), # seconds since the epoch
+    ('seed', '<u8'),
+    ('shoe', '<u4'), # number of the shoe, see Shoe.get_shuffles
+    ('position', '<u4'), # position of the round's first card in the shoe
+    ('outcome', 'i1'), # OUTCOME_WIN, OUTCOME_LOSS or OUTCOME_PUSH
+    ('player_count', 'u1'),
+    ('ai_count', 'u1'),
+    ('action_count', 'u1'),
+    ('player', 'u1', (MAX_CARDS,)), # card codes
+    ('ai', 'u1', (MAX_CARDS,)),
+    ('actions', 'u1', (MAX_ACTIONS,)) # ACTION_HIT, ACTION_STAND, ACTION_DEAL_NEW or ACTION_DOUBLE
+])
+
+def read_header(f):
+    """
+    Reads and checks the header of a log, returns its seed
+    """
+    data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError('not a round log: the header is truncated')
+    magic, version, record_size, seed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError('not a round log of version %d' % VERSION)
+    return seed
+
+class RoundLog:
+    def __init__(self, path, seed = 0, batch_rounds = BATCH_ROUNDS):
+        """
+        Opens the log for appending, the header is written when the file is new
+
+        <string> path
+        <int> seed              Seed of the shoes, recorded with every round
+        <int> batch_rounds      Number of rounds buffered before they are written
+        """
+        self.path = path
+        self.seed = seed
+        self.batch_rounds = batch_rounds
+        self.buffer = bytearray(RECORD.size * batch_rounds)
+        self.count = 0
+        # (dispatcher, handler) of the attached tables
+        self.attached = []
+        self.file = open(path, 'a+b')
+        self.file.seek(0)
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, seed).ljust(HEADER_SIZE, b'\0'))
+        else:
+            read_header(self.file)
+            # drop a record left partially written by a crash
+            size = os.fstat(self.file.fileno()).st_size
+            self.file.truncate(size - (size - HEADER_SIZE) % RECORD.size)
+    def write(self, outcome, player_codes, ai_codes, actions = (), shoe = 0, position = 0, timestamp = None):
+        """
+        Buffers the record of a round
+
+        <int> outcome
+        <list> player_codes     Card codes of the player's hand
+        <list> ai_codes         Card codes of the AI's hand
+        <list> actions          Actions of the player
+        <int> shoe
+        <int> position
+        <float> timestamp       Defaults to the current time
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        RECORD.pack_into(self.buffer, self.count * RECORD.size, timestamp, self.seed, shoe, position, outcome,
+            min(255, len(player_codes)), min(255, len(ai_codes)), min(255, len(actions)),
+            bytes(bytearray(player_codes[:MAX_CARDS])), bytes(bytearray(ai_codes[:MAX_CARDS])), bytes(bytearray(actions[:MAX_ACTIONS])))
+        self.count += 1
+        if self.count == self.batch_rounds:
+            self.flush()
+    def write_table(self, table, outcome):
+        """
+        Buffers the record of the round the table just settled
+        """
+        shoe, position = table.get_round_position()
+        self.write(outcome,
+            [card.code for card in table.get_player_hand().get_cards()],
+            [card.code for card in table.get_ai_hand().get_cards()],
+            table.get_actions(), shoe, position)
+    def attach(self, table):
+        """
+        Records every round settled by the table until the log is closed
+        """
+        handler = lambda result: self.write_table(table, result[0])
+        table.get_dispatcher().add('settle', handler)
+        self.attached.append((table.get_dispatcher(), handler))
+    def flush(self):
+        """
+        Writes the buffered records
+        """
+        if self.count:
+            self.file.write(memoryview(self.buffer)[:self.count * RECORD.size])
+            self.count = 0
+        self.file.flush()
+    def close(self):
+        # stop recording the attached tables
+        for dispatcher, handler in self.attached:
+            dispatcher.remove('settle', handler)
+        self.attached = []
+        self.flush()
+        self.file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+
+def read(path):
+    """
+    Maps the log in memory
+
+    Returns a read-only structured array of RECORD_DTYPE viewing the records
+    """
+    with open(path, 'rb') as f:
+        read_header(f)
+        count = (os.fstat(f.fileno()).st_size - HEADER_SIZE) // RECORD.size
+        if count == 0:
+            return numpy.zeros(0, RECORD_DTYPE)
+        # the array keeps the map open
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return numpy.frombuffer(data, RECORD_DTYPE, count, HEADER_SIZE)
+
+def get_seed(path):
+    """
+    Returns the seed recorded in the log's header
+    """
+    with open(path, 'rb') as f:
+        return read_header(f)
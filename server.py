@@ -0,0 +1,167 @@
+"""
+Serves many independent tables from a single process with asyncio.
+
+Each table has its own dispatcher and shoe and settles its rounds with
+the game's Table rules. Clients send one JSON request per line and receive
+one JSON response per line:
+
+    {"action": "open"}                      opens a new table
+    {"action": "deal", "table": 1}          deals a new round
+    {"action": "hit", "table": 1}
+    {"action": "stand", "table": 1}
+    {"action": "state", "table": 1}
+    {"action": "close", "table": 1}
+
+A table can only be played by the connection which opened it, it is
+closed when that connection ends.
+
+Usage: python server.py [--host HOST] [--port PORT] [--unix PATH]
+"""
+
+# import modules
+
+import argparse, asyncio, itertools, json, random, game
+
+class Session:
+    def __init__(self, table_id, decks = game.SHOE_DECKS, penetration = game.SHOE_PENETRATION, owner = None):
+        """
+        Creates a new table with its own dispatcher and shoe
+
+        <int> table_id
+        <int> decks
+        <float> penetration
+        <int> owner         The connection which opened the table
+        """
+        self.table_id = table_id
+        self.owner = owner
+        self.table = game.Table(game.Shoe(decks, penetration, False, None, random.Random()))
+        self.message = None
+        # keep the message of the last settled round
+        self.table.get_dispatcher().add('settle', self.handle_settle)
+    def handle_settle(self, result):
+        self.message = result[1]
+    def deal(self):
+        self.message = None
+        self.table.new_game()
+        # a round in play was forfeited, its message doesn't belong to the new round
+        if self.is_playing():
+            self.message = None
+    def hit(self):
+        self.table.get_player_hand().hit()
+    def stand(self):
+        self.table.get_player_hand().stand()
+    def is_playing(self):
+        return self.table.get_player_hand().is_playing
+    def get_state(self):
+        """
+        Retrieve the state of the table, the AI's hidden cards are left out
+        """
+        player_hand = self.table.get_player_hand()
+        ai_hand = self.table.get_ai_hand()
+        return {
+            'table': self.table_id,
+            'playing': player_hand.is_playing,
+            'player': [card.get_rank() + card.get_suit() for card in player_hand.get_cards()],
+            'player_value': player_hand.get_value(),
+            'ai': [card.get_rank() + card.get_suit() if card.is_shown else None for card in ai_hand.get_cards()],
+            'outcome': self.table.get_outcome(),
+            'message': self.message,
+            'wins': self.table.get_wins(),
+            'losses': self.table.get_losses()
+        }
+
+class TableServer:
+    def __init__(self, decks = game.SHOE_DECKS, penetration = game.SHOE_PENETRATION):
+        """
+        Creates a new server hosting independent tables
+
+        <int> decks
+        <float> penetration
+        """
+        self.decks = decks
+        self.penetration = penetration
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.connections = itertools.count(1)
+    def get_sessions(self):
+        return self.sessions
+    def handle_request(self, request, owner = None):
+        """
+        Runs a request and returns the response
+
+        <dict> request
+        <int> owner         The connection sending the request, only its own tables can be played
+        """
+        action = request.get('action')
+        if action == 'open':
+            session = Session(next(self.ids), self.decks, self.penetration, owner)
+            self.sessions[session.table_id] = session
+            return session.get_state()
+        table_id = request.get('table')
+        if not isinstance(table_id, int) or isinstance(table_id, bool):
+            return {'error': 'invalid table'}
+        session = self.sessions.get(table_id)
+        if session is None or session.owner != owner:
+            return {'error': 'unknown table'}
+        if action == 'close':
+            del self.sessions[session.table_id]
+            return {'table': session.table_id, 'closed': True}
+        if action == 'deal':
+            session.deal()
+        elif action in ('hit', 'stand'):
+            if not session.is_playing():
+                return {'error': 'no round in play', 'table': session.table_id}
+            if action == 'hit':
+                session.hit()
+            else:
+                session.stand()
+        elif action != 'state':
+            return {'error': 'unknown action'}
+        return session.get_state()
+    async def handle_client(self, reader, writer):
+        """
+        Reads the client's requests line by line, the client's tables
+        are closed when it disconnects
+        """
+        owner = next(self.connections)
+        opened = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = self.handle_request(request, owner)
+                    if request.get('action') == 'open':
+                        opened.append(response['table'])
+                except (ValueError, AttributeError, TypeError):
+                    response = {'error': 'invalid request'}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for table_id in opened:
+                self.sessions.pop(table_id, None)
+            writer.close()
+    async def serve(self, host = '127.0.0.1', port = 8765, path = None, backlog = 1024):
+        """
+        Serves the tables on a TCP port, or on a unix socket when a path is given
+        """
+        if path:
+            server = await asyncio.start_unix_server(self.handle_client, path, backlog=backlog)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+        async with server:
+            await server.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serves blackjack tables.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='path of a unix socket to serve on instead')
+    parser.add_argument('--decks', type=int, default=game.SHOE_DECKS)
+    parser.add_argument('--penetration', type=float, default=game.SHOE_PENETRATION)
+    args = parser.parse_args()
+    asyncio.run(TableServer(args.decks, args.penetration).serve(args.host, args.port, args.unix))
@@ -0,0 +1,100 @@
+"""
+Batch simulation of the game's rounds with NumPy. This module is only
+meant for CPython, it is not loaded by CodeSkulptor.
+"""
+
+# import modules
+
+import numpy, game
+
+# value tables indexed by the card codes of game.py
+
+CARD_VALUES = numpy.array(game.CARD_VALUES, dtype=numpy.int16)
+CARD_LOWER_VALUES = numpy.array(game.CARD_LOWER_VALUES, dtype=numpy.int16)
+
+def encode_cards(cards):
+    """
+    Converts a list of cards into an array of card codes
+
+    <list> cards
+    """
+    return numpy.array([card.code for card in cards], dtype=numpy.int16)
+
+def shuffled_shoes(count, decks = 1, seed = None):
+    """
+    Creates a 2-D array of shuffled shoes, one shoe per row
+
+    <int> count
+    <int> decks         The number of decks in each shoe
+    <int> seed
+    """
+    rng = numpy.random.default_rng(seed)
+    shoe = numpy.arange(52 * decks, dtype=numpy.int16) % 52
+    return rng.permuted(numpy.tile(shoe, (count, 1)), axis=1)
+
+def settle(player_value, player_lower_value, ai_value, ai_lower_value):
+    """
+    Compares the player and AI hands of every row, the same way
+    as Table.handle_compare_scores does.
+
+    Returns a tuple of boolean arrays (win, loss, bust) where bust
+    flags the rows in which the AI busted
+    """
+    # the AI wins with 21
+    ai_blackjack = ai_value == 21
+    # the AI busts when both the lower and higher values are over 21
+    bust = ~ai_blackjack & (ai_value > 21) & (ai_lower_value > 21)
+    higher = numpy.minimum(21, player_value) > numpy.minimum(21, ai_value)
+    win = bust | (~ai_blackjack & higher)
+    return (win, ~win, bust)
+
+def play_rounds(shoes, player_hit_below = None):
+    """
+    Plays one round per shoe (row) for all of the rows at once.
+    The cards are dealt in the order of the row: two to the player,
+    two to the AI, then the player's hits followed by the AI's hits.
+
+    <ndarray> shoes             2-D integer array of card codes
+    <int> player_hit_below      The player hits while the hand is lower than this value,
+                                stands on the first two cards when omitted
+
+    Returns a tuple of boolean arrays (win, loss, bust) where bust
+    flags the rows in which the AI busted
+    """
+    shoes = numpy.asarray(shoes)
+    rows = numpy.arange(shoes.shape[0])
+    values = CARD_VALUES[shoes]
+    lower_values = CARD_LOWER_VALUES[shoes]
+    # deal the first two cards of each hand
+    player_value = values[:, 0] + values[:, 1]
+    player_lower_value = lower_values[:, 0] + lower_values[:, 1]
+    ai_value = values[:, 2] + values[:, 3]
+    ai_lower_value = lower_values[:, 2] + lower_values[:, 3]
+    position = numpy.full(shoes.shape[0], 4)
+    # the player wins right away with 21 and loses right away when busted
+    won = player_value == 21
+    lost = numpy.zeros(shoes.shape[0], dtype=bool)
+    if player_hit_below:
+        hitting = ~won & (player_value < player_hit_below)
+        while hitting.any():
+            index = rows[hitting]
+            player_value[index] += values[index, position[index]]
+            player_lower_value[index] += lower_values[index, position[index]]
+            position[index] += 1
+            won |= player_value == 21
+            lost |= (player_value > 21) & (player_lower_value > 21)
+            hitting = ~won & ~lost & (player_value < player_hit_below)
+    # the AI hits while its hand is lower than 17
+    hitting = ~won & ~lost & (ai_value < 17)
+    while hitting.any():
+        index = rows[hitting]
+        ai_value[index] += values[index, position[index]]
+        ai_lower_value[index] += lower_values[index, position[index]]
+        position[index] += 1
+        hitting &= ai_value < 17
+    win, loss, bust = settle(player_value, player_lower_value, ai_value, ai_lower_value)
+    # rounds which ended during the player's turn are never compared
+    ended = won | lost
+    win = numpy.where(ended, won, win)
+    bust &= ~ended
+    return (win, ~win, bust)
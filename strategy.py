@@ -0,0 +1,190 @@
+"""
+Solves the player's hit/stand decisions under the game's rules and compiles
+them into a dense lookup table indexed by Hand.get_state and the rank of
+the AI's upcard. Solved tables are cached on disk, keyed by the rules.
+
+Hands are scored as by the game's Rules: busting loses, hands over 21 which
+aren't busted compare as 21, reaching 21 wins right away (or the player
+stands on it) and ties are lost (or pushed). The cards are drawn from a
+fixed shoe composition.
+"""
+
+# import modules
+
+import hashlib, json, os, game, probability
+
+HIT = 1
+STAND = 0
+SOLVER_VERSION = 2 # bump when the solver's results change
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'blackjack')
+
+def state_of(value, aces):
+    """
+    Returns the hand state (see Hand.get_state) of the given value and number of Aces
+    """
+    hard_value = value - 10 * aces
+    if hard_value > 21:
+        return game.HAND_STATE_BUST
+    if aces > 0 and hard_value + 10 <= 21:
+        return min(22, value) * 2 + 1
+    return min(22, value) * 2
+
+def get_rules(rules = None, decks = game.SHOE_DECKS):
+    """
+    Returns the dictionary of the rules which the decisions depend on,
+    the payout of a two-card 21 and doubling don't change whether to hit
+
+    <Rules> rules       The game's original rules when omitted
+    <int> decks
+    """
+    if rules is None:
+        rules = game.default_rules
+    if not 17 <= rules.stand_on <= 21:
+        raise ValueError('the AI must stand on a value from 17 to 21, not %r' % (rules.stand_on,))
+    return {
+        'decks': decks,
+        'stand_on': rules.stand_on,
+        'hit_soft_17': rules.hit_soft_17,
+        'twenty_one_wins': rules.twenty_one_wins,
+        'push_on_tie': rules.push_on_tie
+    }
+
+class Solver:
+    def __init__(self, rules = None, decks = game.SHOE_DECKS):
+        """
+        Creates a new solver for the given rules
+
+        <Rules> rules       The game's original rules when omitted
+        <int> decks         Decks in the shoe
+        """
+        self.rules = get_rules(rules, decks)
+        self.dealer = probability.DealerOutcomes(self.rules['stand_on'], self.rules['hit_soft_17'])
+        self.composition = probability.shoe_composition(decks)
+    def stand_value(self, value, outcomes):
+        """
+        Returns the expected value of standing with the given value
+
+        <int> value
+        <tuple> outcomes    The AI's outcome probabilities
+        """
+        value = min(21, value)
+        win = outcomes[probability.BUST]
+        # the AI only loses to a higher hand
+        for total in range(17, value):
+            win += outcomes[total - 17]
+        # ties (the AI's 21 included) are lost unless they are pushed
+        tie = 0.0
+        if self.rules['push_on_tie'] and value >= 17:
+            tie = outcomes[value - 17]
+        return win - (1 - win - tie)
+    def solve_upcard(self, upcard):
+        """
+        Calculates the expected values of hitting and standing of every
+        hand state against the given upcard
+
+        Returns a tuple of dictionaries (hit values, stand values) keyed by state
+        """
+        composition = probability.remove_card(self.composition, upcard)
+        outcomes = self.dealer.get(upcard, composition)
+        total = float(sum(composition))
+        hit_values = {}
+        stand_values = {}
+        # values over 21 which aren't busted can't improve, the player always stands
+        stand_values[22 * 2] = self.stand_value(21, outcomes)
+        stand_values[22 * 2 + 1] = self.stand_value(21, outcomes)
+        # solve the higher values first, hitting only ever increases the value
+        for value in range(21, 1, -1):
+            for aces in (0, 1):
+                hard_value = value - 10 * aces
+                if hard_value < aces or (aces and hard_value + 10 > 21):
+                    continue
+                state = state_of(value, aces)
+                stand_values[state] = self.stand_value(value, outcomes)
+                hit_value = 0.0
+                for rank in range(10):
+                    drawn_aces = aces + (1 if rank == 0 else 0)
+                    drawn_value = hard_value + probability.RANK_LOWER_VALUES[rank] + 10 * drawn_aces
+                    drawn_state = state_of(drawn_value, drawn_aces)
+                    if drawn_state == game.HAND_STATE_BUST:
+                        result = -1.0
+                    elif drawn_value == 21:
+                        # 21 wins right away, or the player stands on it
+                        if self.rules['twenty_one_wins']:
+                            result = 1.0
+                        else:
+                            result = stand_values[drawn_state]
+                    elif drawn_state in hit_values:
+                        result = max(hit_values[drawn_state], stand_values[drawn_state])
+                    else:
+                        result = stand_values[drawn_state]
+                    hit_value += composition[rank] / total * result
+                hit_values[state] = hit_value
+        return (hit_values, stand_values)
+    def solve(self):
+        """
+        Solves every (state, upcard) pair
+
+        Returns the StrategyTable of the rules
+        """
+        decisions = bytearray(game.HAND_STATES * 10)
+        for upcard in range(10):
+            hit_values, stand_values = self.solve_upcard(upcard)
+            for state, hit_value in hit_values.items():
+                if hit_value > stand_values[state]:
+                    decisions[state * 10 + upcard] = HIT
+        return StrategyTable(bytes(decisions), self.rules)
+
+class StrategyTable:
+    def __init__(self, decisions, rules):
+        """
+        Creates a new lookup table of decisions
+
+        <bytes> decisions   HIT or STAND of each state * 10 + upcard rank
+        <dict> rules        See get_rules
+        """
+        self.decisions = decisions
+        self.rules = rules
+    def get_decision(self, state, upcard):
+        """
+        Returns HIT or STAND for the hand state and the rank of the AI's upcard
+        """
+        return self.decisions[state * 10 + upcard]
+    def policy(self, table):
+        """
+        Policy to be given to Table.play_round, returns True to hit
+        """
+        upcard = probability.CARD_RANKS[table.get_ai_hand().get_cards()[0].code]
+        return self.decisions[table.get_player_hand().get_state() * 10 + upcard] == HIT
+    def get_rules(self):
+        return self.rules
+
+def rules_key(rules):
+    """
+    Returns the cache key of the given rules
+    """
+    data = json.dumps({'rules': rules, 'version': SOLVER_VERSION}, sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+def load(rules = None, decks = game.SHOE_DECKS, cache_dir = CACHE_DIR):
+    """
+    Loads the strategy table of the given rules from the disk cache,
+    solves and caches it when it isn't cached yet
+
+    <Rules> rules       The game's original rules when omitted
+    <int> decks
+    <string> cache_dir
+    """
+    path = os.path.join(cache_dir, 'strategy-%s.json' % rules_key(get_rules(rules, decks)))
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        return StrategyTable(bytes(bytearray(data['decisions'])), data['rules'])
+    strategy = Solver(rules, decks).solve()
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    # write to a temporary file first so that concurrent readers never see a partial table
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary_path, 'w') as f:
+        json.dump({'rules': strategy.get_rules(), 'decisions': list(bytearray(strategy.decisions))}, f)
+    os.rename(temporary_path, path)
+    return strategy
@@ -0,0 +1,28 @@
+import game, corpus, montecarlo
+
+def test_shoes_are_dealt_in_the_corpus_order(tmp_path):
+    path = str(tmp_path / 'shoes.bin')
+    corpus.generate(path, 3, 2, seed=1)
+    shoes = corpus.Corpus(path)
+    assert shoes.get_shoes().shape == (3, 104)
+    assert shoes.get_decks() == 2 and shoes.get_seed() == 1
+    shoe = corpus.create_shoe(shoes, penetration=1.0)
+    for index in (0, 1, 2, 0):
+        codes = [shoe.deal().code for i in range(104)]
+        assert codes == shoes.get_shoe(index).tolist()
+        shoe.reset()
+
+def test_start_past_the_last_shoe_wraps(tmp_path):
+    path = str(tmp_path / 'shoes.bin')
+    corpus.generate(path, 4, 1, seed=1)
+    shoes = corpus.Corpus(path)
+    stream = corpus.CorpusRandom(shoes, 6, 10)
+    assert stream.next_shoe().tolist() == shoes.get_shoe(2).tolist()
+    assert stream.next_shoe().tolist() == shoes.get_shoe(2).tolist()
+
+def test_run_with_more_chunks_than_shoes(tmp_path):
+    path = str(tmp_path / 'shoes.bin')
+    corpus.generate(path, 10, 6, 1)
+    result = montecarlo.run(30000, workers=1, hit_below=15, chunk_rounds=1000, corpus_path=path)
+    assert result['rounds'] == 30000
+    assert result['statistics'].get_rounds() == 30000
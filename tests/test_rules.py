@@ -0,0 +1,88 @@
+import random
+import pytest
+import game, strategy
+
+def original_outcome(player_cards, ai_cards):
+    """
+    Outcome of a round by the game's rules from before Rules: reaching 21
+    wins right away, busting loses, the AI hits while lower than 17, its 21
+    wins, its bust loses and the hands are compared as at most 21 with the
+    ties lost
+    """
+    player = game.Hand()
+    for card in player_cards:
+        player.add_card(card)
+    ai = game.Hand()
+    for card in ai_cards:
+        ai.add_card(card)
+    if player.is_blackjack():
+        return game.OUTCOME_WIN
+    if player.is_bust():
+        return game.OUTCOME_LOSS
+    if ai.is_blackjack():
+        return game.OUTCOME_LOSS
+    if ai.is_bust():
+        return game.OUTCOME_WIN
+    if min(21, player.get_value()) > min(21, ai.get_value()):
+        return game.OUTCOME_WIN
+    return game.OUTCOME_LOSS
+
+def ai_hits(ai_cards):
+    """
+    Returns True if the AI hit exactly while its hand was lower than 17
+    """
+    value = sum([game.CARD_VALUES[card.code] for card in ai_cards[:2]])
+    for card in ai_cards[2:]:
+        if value >= 17:
+            return False
+        value += game.CARD_VALUES[card.code]
+    return True
+
+@pytest.mark.parametrize('hit_below', [None, 12, 15, 17])
+def test_default_rules_play_the_original_game(hit_below):
+    table = game.Table(game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(hit_below)))
+    statistics = game.Statistics()
+    statistics.attach(table)
+    policy = None
+    if hit_below:
+        policy = lambda t: t.get_player_hand().get_value() < hit_below
+    for i in range(5000):
+        outcome = table.play_round(policy)
+        player_cards = table.get_player_hand().get_cards()
+        ai_cards = table.get_ai_hand().get_cards()
+        assert outcome == original_outcome(player_cards, ai_cards)
+        # the AI only plays when the player stands
+        if table.get_player_hand().get_value() < 21:
+            assert ai_hits(ai_cards)
+    assert table.get_pushes() == 0
+    assert statistics.get_units() == table.get_wins() - table.get_losses()
+
+def test_rules_tables():
+    rules = game.Rules(push_on_tie=True, hit_soft_17=True, double=True, double_on=(10, 11))
+    # soft 17 (Ace and 6) is hit, hard 17 isn't
+    assert rules.get_ai_hits()[17 * 2 + 1]
+    assert not rules.get_ai_hits()[17 * 2]
+    assert rules.settle(18 * 2, 18 * 2) == (game.OUTCOME_PUSH, game.CATEGORY_TIE)
+    assert rules.settle(20 * 2, 21 * 2) == (game.OUTCOME_LOSS, game.CATEGORY_AI_21)
+    assert rules.can_double(11 * 2) and not rules.can_double(12 * 2)
+    assert game.default_rules.settle(18 * 2, 18 * 2) == (game.OUTCOME_LOSS, game.CATEGORY_TIE)
+
+def test_strategy_is_solved_for_the_rules():
+    default_rules = strategy.get_rules()
+    push_rules = strategy.get_rules(game.Rules(push_on_tie=True))
+    assert strategy.rules_key(default_rules) != strategy.rules_key(push_rules)
+    assert strategy.Solver(game.Rules(push_on_tie=True)).solve().get_rules() == push_rules
+    with pytest.raises(ValueError):
+        strategy.Solver(game.Rules(stand_on=16))
+
+def test_ai_stands_on_21_at_most():
+    with pytest.raises(ValueError):
+        game.Rules(stand_on=22)
+    rules = game.Rules(stand_on=21)
+    table = game.Table(game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(4)), rules=rules)
+    settled = []
+    table.get_dispatcher().add('settle', settled.append)
+    for i in range(1000):
+        table.play_round()
+    assert len(settled) == 1000
+    assert table.get_wins() + table.get_losses() + table.get_pushes() == 1000
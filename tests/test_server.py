@@ -0,0 +1,62 @@
+import asyncio, json
+import server
+
+def test_deal_over_a_round_in_play_is_forfeited_once():
+    tables = server.TableServer()
+    table_id = tables.handle_request({'action': 'open'}, 1)['table']
+    state = tables.handle_request({'action': 'deal', 'table': table_id}, 1)
+    forfeits = 0
+    for i in range(300):
+        settled = state['wins'] + state['losses']
+        playing = state['playing']
+        state = tables.handle_request({'action': 'deal', 'table': table_id}, 1)
+        forfeits += playing
+        # the forfeited round plus a new round settled right away by a 21
+        assert state['wins'] + state['losses'] == settled + playing + (not state['playing'])
+        if state['playing']:
+            assert state['outcome'] is None and state['message'] is None
+        else:
+            assert state['outcome'] == 1 and state['message']
+    assert forfeits > 0
+
+def test_tables_belong_to_their_connection():
+    tables = server.TableServer()
+    table_id = tables.handle_request({'action': 'open'}, 1)['table']
+    assert tables.handle_request({'action': 'deal', 'table': table_id}, 2) == {'error': 'unknown table'}
+    assert tables.handle_request({'action': 'close', 'table': table_id}, 2) == {'error': 'unknown table'}
+    assert tables.handle_request({'action': 'deal', 'table': [table_id]}, 1) == {'error': 'invalid table'}
+    assert tables.handle_request({'action': 'deal', 'table': True}, 1) == {'error': 'invalid table'}
+
+def test_protocol():
+    async def session():
+        tables = server.TableServer()
+        listener = await asyncio.start_server(tables.handle_client, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        async def send(request):
+            writer.write(json.dumps(request).encode() + b'\n')
+            return json.loads(await reader.readline())
+        opened = await send({'action': 'open'})
+        table_id = opened['table']
+        assert opened['playing'] is False and opened['wins'] == opened['losses'] == 0
+        state = await send({'action': 'deal', 'table': table_id})
+        while not state['playing']:
+            state = await send({'action': 'deal', 'table': table_id})
+        settled = state['wins'] + state['losses']
+        # dealing again forfeits the round in play
+        state = await send({'action': 'deal', 'table': table_id})
+        assert state['losses'] >= 1
+        assert state['wins'] + state['losses'] == settled + 1 + (not state['playing'])
+        while state['playing']:
+            state = await send({'action': 'stand', 'table': table_id})
+        assert state['outcome'] is not None
+        assert (await send({'action': 'stand', 'table': table_id}))['error'] == 'no round in play'
+        assert (await send({'action': 'close', 'table': table_id})) == {'table': table_id, 'closed': True}
+        assert (await send({'action': 'state', 'table': table_id})) == {'error': 'unknown table'}
+        assert (await send([])) == {'error': 'invalid request'}
+        writer.close()
+        await writer.wait_closed()
+        listener.close()
+        await listener.wait_closed()
+        assert tables.get_sessions() == {}
+    asyncio.run(session())
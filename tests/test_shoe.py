@@ -0,0 +1,50 @@
+import random
+import game
+
+def seen_count(cards, system = 'hi-lo'):
+    tags = game.COUNTING_SYSTEMS[system]
+    return sum([tags[game.CARD_RANK_INDEXES[card.code]] for card in cards])
+
+def seen_composition(shoe, cards):
+    composition = [4 * shoe.decks] * 13
+    for card in cards:
+        composition[game.CARD_RANK_INDEXES[card.code]] -= 1
+    return tuple(composition)
+
+def test_count_at_the_deal_leaves_out_the_hole_card():
+    shoe = game.Shoe(6, game.SHOE_PENETRATION, False, None, random.Random(2))
+    table = game.Table(shoe)
+    counts = []
+    # count at the player's decision point
+    policy = lambda t: counts.append((shoe.get_running_count(), shoe.get_composition())) or False
+    seen = []
+    for i in range(200):
+        if shoe.get_position() >= shoe.get_cut_card():
+            seen = []
+        counts = []
+        table.play_round(policy)
+        player_cards = table.get_player_hand().get_cards()
+        ai_cards = table.get_ai_hand().get_cards()
+        if counts:
+            # the player's cards and the AI's upcard
+            visible = seen + player_cards + ai_cards[:1]
+            assert counts[0] == (seen_count(visible), seen_composition(shoe, visible))
+        seen = seen + player_cards + [card for card in ai_cards if card.is_shown]
+        assert shoe.get_running_count() == seen_count(seen)
+        assert shoe.get_composition() == seen_composition(shoe, seen)
+
+def test_revealed_card_is_counted_once():
+    shoe = game.Shoe(1, 1.0, False, None, random.Random(3))
+    card = shoe.deal_hidden()
+    assert shoe.get_running_count() == 0 and sum(shoe.get_composition()) == 52
+    shoe.reveal(card)
+    shoe.reveal(card)
+    assert card.is_shown
+    assert shoe.get_running_count() == seen_count([card])
+    assert sum(shoe.get_composition()) == 51
+    # switching systems recounts the seen cards only
+    hidden = shoe.deal_hidden()
+    shoe.set_counting_system('ko')
+    assert shoe.get_running_count() == seen_count([card], 'ko')
+    shoe.reveal(hidden)
+    assert shoe.get_running_count() == seen_count([card, hidden], 'ko')
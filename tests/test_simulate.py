@@ -0,0 +1,49 @@
+import pytest
+import game, montecarlo, simulate
+
+class OrderedDeck(game.Deck):
+    def __init__(self, codes):
+        """
+        Headless deck dealing the card codes in order, every round starts over
+
+        <list> codes
+        """
+        self.codes = list(codes)
+        game.Deck.__init__(self, False)
+    def reset(self):
+        cards = game.Deck.build(self)
+        self.cards = [cards[code] for code in reversed(self.codes)]
+    def deal(self):
+        return self.cards.pop()
+
+@pytest.mark.parametrize('hit_below', [None, 12, 15, 17])
+def test_play_rounds_matches_the_table(hit_below):
+    shoes = simulate.shuffled_shoes(500, 1, seed=5)
+    win, loss, bust = simulate.play_rounds(shoes, hit_below)
+    policy = None
+    if hit_below:
+        policy = lambda t: t.get_player_hand().get_value() < hit_below
+    for i, codes in enumerate(shoes.tolist()):
+        table = game.Table(OrderedDeck(codes))
+        outcome = table.play_round(policy)
+        assert win[i] == (outcome == game.OUTCOME_WIN)
+        assert loss[i] == (outcome == game.OUTCOME_LOSS)
+        assert bust[i] == table.get_ai_hand().is_bust()
+
+def test_run_is_independent_of_the_workers():
+    serial = montecarlo.run(3000, seed=7, workers=1, hit_below=15, chunk_rounds=500)
+    parallel = montecarlo.run(3000, seed=7, workers=2, hit_below=15, chunk_rounds=500)
+    for key in montecarlo.RESULT_KEYS:
+        assert serial[key] == parallel[key]
+    assert serial['statistics'].get_units() == parallel['statistics'].get_units()
+    assert serial['statistics'].get_mean() == parallel['statistics'].get_mean()
+    assert serial['statistics'].get_histogram() == parallel['statistics'].get_histogram()
+    assert serial['statistics'].get_categories() == parallel['statistics'].get_categories()
+
+def test_run_counts_every_round_once():
+    result = montecarlo.run(5000, seed=3, workers=1, hit_below=15, chunk_rounds=1000)
+    assert result['wins'] + result['losses'] + result['pushes'] == 5000
+    assert result['pushes'] == 0 and result['ties'] > 0
+    result = montecarlo.run(5000, seed=3, workers=1, hit_below=15, chunk_rounds=1000, rules=game.Rules(push_on_tie=True))
+    assert result['wins'] + result['losses'] + result['pushes'] == 5000
+    assert result['pushes'] == result['ties']
@@ -0,0 +1,41 @@
+import gc, random
+import pytest
+import game
+
+def test_attach_keeps_the_collector_alive():
+    table = game.Table(game.Shoe(game.SHOE_DECKS, game.SHOE_PENETRATION, False, None, random.Random(1)))
+    game.Statistics().attach(table)
+    gc.collect()
+    assert len(table.get_dispatcher().get_handlers('settle')) == 1
+    statistics = table.get_dispatcher().get_handlers('settle')[0].__self__
+    for i in range(100):
+        table.play_round()
+    assert statistics.get_rounds() == 100
+    statistics.detach(table)
+    table.play_round()
+    assert statistics.get_rounds() == 100
+    assert table.get_dispatcher().get_handlers('settle') == []
+
+def test_variance_and_merge():
+    rng = random.Random(5)
+    outcomes = [rng.choice((-2, -1, -1, 0, 1, 1, 1.5, 2)) for i in range(1000)]
+    statistics = game.Statistics()
+    parts = [game.Statistics(), game.Statistics(), game.Statistics()]
+    for i, units in enumerate(outcomes):
+        statistics.add(units, game.CATEGORY_HIGHER if units > 0 else game.CATEGORY_LOWER)
+        parts[i * 3 // len(outcomes)].add(units, game.CATEGORY_HIGHER if units > 0 else game.CATEGORY_LOWER)
+    mean = sum(outcomes) / float(len(outcomes))
+    variance = sum([(units - mean) ** 2 for units in outcomes]) / (len(outcomes) - 1)
+    assert statistics.get_mean() == pytest.approx(mean)
+    assert statistics.get_variance() == pytest.approx(variance)
+    assert statistics.get_standard_error() == pytest.approx((variance / len(outcomes)) ** 0.5)
+    merged = game.Statistics()
+    for part in parts + [game.Statistics()]:
+        assert merged.merge(part) is merged
+    assert merged.get_rounds() == 1000
+    assert merged.get_units() == pytest.approx(sum(outcomes))
+    assert merged.get_mean() == pytest.approx(mean)
+    assert merged.get_variance() == pytest.approx(variance)
+    assert merged.get_histogram() == statistics.get_histogram()
+    assert merged.get_categories() == statistics.get_categories()
+    assert game.Statistics().get_variance() == 0.0